@@ -35,6 +35,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its totals cover the rest of the stack
+    'timesheet_app.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,12 +96,51 @@ CHANNEL_LAYERS = {
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_PROFILE=postgres selects the production profile; anything else is local SQLite.
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    # Psycopg's connection pool replaces persistent connections (Django rejects both at once),
+    # so CONN_MAX_AGE only applies with POSTGRES_POOL=0.
+    POSTGRES_POOL = os.environ.get('POSTGRES_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'timesheet'),
+            'USER': os.environ.get('POSTGRES_USER', 'timesheet'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', '20')),
+                    'timeout': 10,
+                },
+            } if POSTGRES_POOL else {},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked"
+                'timeout': 20,
+                # Take the write lock at BEGIN so two transactions never deadlock upgrading read -> write
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Applied to every new SQLite connection (see timesheet_app/signals/database_signals.py)
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+]
 
 
 # Password validation
@@ -145,9 +186,59 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Performance metrics are recomputed by `manage.py process_performance_queue`.
+# Set PERFORMANCE_QUEUE_EAGER=1 to drain the queue in-process after each commit instead.
+PERFORMANCE_QUEUE_EAGER = os.environ.get('PERFORMANCE_QUEUE_EAGER', '0') == '1'
+
+# LocMemCache is private to each process: an invalidation made in one process is never seen
+# by the others. Any deployment running more than one process (several web workers, or
+# process_performance_queue next to the web server) must set CACHE_REDIS_URL to share one cache.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'timesheet',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Seconds the cached org hierarchy lives. UserRole changes drop it at once in the shared cache;
+# with the per-process LocMemCache other processes only pick them up when it expires, so keep it short.
+ORG_HIERARCHY_CACHE_TIMEOUT = int(os.environ.get('ORG_HIERARCHY_CACHE_TIMEOUT', '3600' if CACHE_REDIS_URL else '30'))
+
+# Seconds a cached performance read lives; entries are also dropped whenever their rows are recomputed.
+# The recompute bumps cache versions in the process that runs it: without CACHE_REDIS_URL only
+# PERFORMANCE_QUEUE_EAGER=1 keeps reads fresh, and a separate worker leaves them stale up to this long.
+PERFORMANCE_CACHE_TIMEOUT = int(os.environ.get('PERFORMANCE_CACHE_TIMEOUT', '300'))
+
+# One JSON line per request from RequestMetricsMiddleware; set REQUEST_METRICS_LOG_LEVEL=WARNING to silence it
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'timesheet_app.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'timesheet_app.authentication.ClaimsJWTAuthentication',
     ]
 }
 
@@ -12,5 +12,6 @@ urlpatterns = [
     path('api/leave/', include("timesheet_app.urls.leave_urls")),
     path('api/task/', include("timesheet_app.urls.task_urls")),
     path('api/performance/', include("timesheet_app.urls.performance_urls")),
-    path('api/template/', include("timesheet_app.urls.template_urls"))
+    path('api/template/', include("timesheet_app.urls.template_urls")),
+    path('api/metrics/', include("timesheet_app.urls.metrics_urls"))
 ]
@@ -6,3 +6,7 @@ class TimesheetAppConfig(AppConfig):
     name = 'timesheet_app'
     def ready(self):
      import timesheet_app.signals.timesheet_signals
+     import timesheet_app.signals.userrole_signals
+     import timesheet_app.signals.user_signals
+     import timesheet_app.signals.database_signals
+     import timesheet_app.signals.performance_signals
@@ -0,0 +1,36 @@
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from timesheet_app.models import ClaimsUser
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token instead of loading the user.
+    request.user is a ClaimsUser carrying `role` from the token; the User row
+    is only fetched if a view reads another field. That also skips the
+    is_active check, so a deactivated user's access token keeps working until
+    it expires; revoke_refresh_tokens() stops them from getting another one.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        return ClaimsUser.from_claims(int(user_id), role=validated_token.get("role"))
+
+
+def revoke_refresh_tokens(user_id):
+    """
+    Blacklist every unexpired refresh token of a user, so no new access token
+    (with stale role claims, or for a deactivated account) can be minted.
+    """
+    tokens = OutstandingToken.objects.filter(
+        user_id=user_id, expires_at__gt=timezone.now(), blacklistedtoken__isnull=True
+    )
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens], ignore_conflicts=True)
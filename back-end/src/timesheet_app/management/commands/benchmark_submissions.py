@@ -0,0 +1,113 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from rest_framework.test import APIClient
+
+from timesheet_app.models import Project, Task, UserRole
+from timesheet_app.utils.calendar import is_working_day
+
+FIRST_WEEK = date(2040, 1, 2)
+
+
+def submission_payload(week_start, tasks):
+    days = [week_start + timedelta(days=offset) for offset in range(5)]
+    return {
+        "week_start_date": str(week_start),
+        "daily_logs": [
+            {
+                "date": str(day),
+                "start_time": "09:00",
+                "end_time": "17:00",
+                "task_entries": [{"task_id": task.id, "duration": 8.0 / len(tasks)} for task in tasks],
+            }
+            for day in days
+            if is_working_day(day)
+        ],
+    }
+
+
+def run_writer(user, tasks, submissions):
+    """Submit `submissions` consecutive weeks as `user`. Returns (latencies, errors)."""
+    client = APIClient()
+    client.force_authenticate(user)
+    latencies = []
+    errors = []
+    try:
+        for week in range(submissions):
+            payload = submission_payload(FIRST_WEEK + timedelta(weeks=week), tasks)
+            started = time.perf_counter()
+            try:
+                response = client.post("/api/timesheet/create", payload, format="json")
+            except DatabaseError as exc:
+                errors.append(str(exc))
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 201:
+                errors.append(f"HTTP {response.status_code}: {response.content[:200]!r}")
+    finally:
+        # Each thread has its own connection; release it rather than leaking it to the pool
+        connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = "Measure timesheet submission throughput with concurrent writers against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8, 16], help="Concurrent writer counts to run")
+        parser.add_argument("--submissions", type=int, default=20, help="Timesheets each writer submits")
+        parser.add_argument("--tasks", type=int, default=4, help="Task entries per day in each submission")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark users and data afterwards")
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f"Database: {connection.vendor} ({settings_dict['NAME']}), "
+            f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, pool={bool(settings_dict['OPTIONS'].get('pool'))}"
+        )
+
+        prefix = f"bench_{int(time.time())}"
+        manager = User.objects.create_user(f"{prefix}_manager")
+        UserRole.objects.create(user=manager, role="manager")
+        project = Project.objects.create(project_name=f"{prefix} project", description="Benchmark", manager=manager)
+        tasks = [Task.objects.create(project=project, name=f"{prefix} task {i}") for i in range(options["tasks"])]
+        created_users = [manager]
+
+        try:
+            for writers in options["writers"]:
+                users = []
+                for i in range(writers):
+                    user = User.objects.create_user(f"{prefix}_{writers}_{i}")
+                    UserRole.objects.create(user=user, role="employee", manager=manager)
+                    users.append(user)
+                created_users.extend(users)
+                self.run_round(users, tasks, options["submissions"])
+        finally:
+            if not options["keep"]:
+                # Cascades to the benchmark timesheets, logs and entries
+                User.objects.filter(id__in=[user.id for user in created_users]).delete()
+                project.delete()
+
+    def run_round(self, users, tasks, submissions):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            results = list(pool.map(lambda user: run_writer(user, tasks, submissions), users))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for writer_latencies, _ in results for latency in writer_latencies)
+        errors = [error for _, writer_errors in results for error in writer_errors]
+        succeeded = len(users) * submissions - len(errors)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+
+        self.stdout.write(
+            f"{len(users):>3} writers: {succeeded} ok, {len(errors)} failed in {elapsed:.2f}s "
+            f"-> {succeeded / elapsed:.1f} submissions/s, "
+            f"p50 {statistics.median(latencies) * 1000 if latencies else 0:.0f}ms, p95 {p95 * 1000:.0f}ms"
+        )
+        for error in errors[:3]:
+            self.stdout.write(self.style.WARNING(f"    {error}"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from timesheet_app.models import Task, TaskEntry
+from timesheet_app.utils.task_hours import entry_hours_by_task
+
+
+class Command(BaseCommand):
+    help = "Find tasks whose logged_hours drifted from their task entries, optionally repairing them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Write the recomputed hours back")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--tolerance", type=float, default=0.001, help="Hours of difference still treated as consistent")
+
+    def handle(self, *args, **options):
+        tolerance = options["tolerance"]
+        actual_hours = entry_hours_by_task(TaskEntry.objects.all())
+
+        drifted = []
+        for task in Task.objects.only("id", "logged_hours").order_by("id").iterator(chunk_size=options["batch_size"]):
+            actual = actual_hours.get(task.id) or 0.0
+            if abs(task.logged_hours - actual) > tolerance:
+                self.stdout.write(f"Task {task.id}: stored {task.logged_hours}h, entries sum to {actual}h")
+                task.logged_hours = actual
+                drifted.append(task)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All task logged hours are consistent"))
+            return
+
+        if not options["fix"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} tasks drifted; rerun with --fix to repair"))
+            return
+
+        Task.objects.bulk_update(drifted, ["logged_hours"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} tasks"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Abs, Coalesce, Greatest
+
+from timesheet_app.models import Timesheet
+
+
+class Command(BaseCommand):
+    help = "Find timesheets whose stored total/overtime hours drifted from their task entries, optionally repairing them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Write the recomputed totals back")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--tolerance", type=float, default=0.001, help="Hours of difference still treated as consistent")
+
+    def handle(self, *args, **options):
+        tolerance = options["tolerance"]
+        drifted = list(
+            Timesheet.objects.annotate(
+                actual_total=Coalesce(Sum("daily_logs__task_entries__duration"), Value(0.0)),
+            )
+            .annotate(actual_overtime=Greatest(F("actual_total") - Value(40.0), Value(0.0)))
+            .alias(
+                total_drift=Abs(F("total_hours") - F("actual_total")),
+                overtime_drift=Abs(F("overtime_hours") - F("actual_overtime")),
+            )
+            .filter(Q(total_drift__gt=tolerance) | Q(overtime_drift__gt=tolerance))
+            .only("id", "total_hours", "overtime_hours")
+        )
+
+        for timesheet in drifted:
+            self.stdout.write(
+                f"Timesheet {timesheet.id}: stored {timesheet.total_hours}h/{timesheet.overtime_hours}h overtime, "
+                f"entries sum to {timesheet.actual_total}h/{timesheet.actual_overtime}h"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All timesheet totals are consistent"))
+            return
+
+        if not options["fix"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} timesheets drifted; rerun with --fix to repair"))
+            return
+
+        for timesheet in drifted:
+            timesheet.total_hours = timesheet.actual_total
+            timesheet.overtime_hours = timesheet.actual_overtime
+        Timesheet.objects.bulk_update(drifted, ["total_hours", "overtime_hours"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} timesheets"))
@@ -0,0 +1,317 @@
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from datetime import time as clock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from timesheet_app.models import DailyLog, Project, Task, TaskEntry, Timesheet, UserRole
+from timesheet_app.models.leave_model import LeaveRequest
+from timesheet_app.utils.calendar import is_working_day
+from timesheet_app.utils.employee_snapshot import rebuild_employee_snapshots
+from timesheet_app.utils.org_hierarchy import invalidate_org_hierarchy
+from timesheet_app.utils.performance_calculator import ADMIN_CATEGORIES
+
+LEAVE_TYPES = ["vacation"] * 6 + ["sick"] * 3 + ["unpaid", "other"]
+LEAVE_LENGTHS = [1, 1, 1, 2, 3, 5, 5, 10]
+REJECTION_REASONS = ["Hours do not match the project plan.", "Missing task breakdown.", "Please split the overtime."]
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _split_hours(rng, total, parts):
+    """Split `total` hours into `parts` random quarter-hour slices."""
+    quarters = int(round(total * 4))
+    cuts = sorted(rng.sample(range(1, quarters), parts - 1))
+    bounds = [0] + cuts + [quarters]
+    return [(end - start) / 4 for start, end in zip(bounds, bounds[1:])]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic organisation (managers, employees, projects, tasks) with leave and "
+        "timesheet history for load testing. Output is fully determined by --seed and --end-week."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Employees to create (managers are added on top)")
+        parser.add_argument("--weeks", type=int, default=26, help="Weeks of timesheet history per employee")
+        parser.add_argument("--projects", type=int, default=20, help="Client projects, spread across the managers")
+        parser.add_argument("--tasks-per-project", type=int, default=12)
+        parser.add_argument("--team-size", type=int, default=8, help="Employees per manager")
+        parser.add_argument("--end-week", help="Monday of the newest week (YYYY-MM-DD); defaults to this week")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="load", help="Prefix for generated usernames and project names")
+        parser.add_argument("--password", default="loadtest", help="Password of every generated user")
+        parser.add_argument("--user-batch", type=int, default=100, help="Employees whose history is written per transaction")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per bulk INSERT")
+        parser.add_argument("--recompute", action="store_true", help="Run recompute_performance for the generated projects afterwards")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes for --recompute")
+
+    def handle(self, *args, **options):
+        for name in ("users", "weeks", "projects", "tasks_per_project", "team_size", "user_batch", "chunk_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1.")
+
+        end_week = date.today() - timedelta(days=date.today().weekday())
+        if options["end_week"]:
+            end_week = parse_date(options["end_week"])
+            if end_week is None or end_week.weekday() != 0:
+                raise CommandError("--end-week must be a Monday in YYYY-MM-DD format.")
+
+        self.prefix = options["prefix"]
+        self.chunk_size = options["chunk_size"]
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Users prefixed '{self.prefix}_' already exist; pick another --prefix.")
+
+        self.seed = options["seed"]
+        self.weeks = [end_week - timedelta(weeks=week) for week in range(options["weeks"] - 1, -1, -1)]
+        self.started = time.monotonic()
+        self.rows = 0
+
+        rng = random.Random(self.seed)
+        managers, employees = self.create_org(rng, options["users"], options["team_size"], options["password"])
+        projects, tasks, internal_tasks = self.create_projects(rng, managers, employees, options["projects"], options["tasks_per_project"])
+        invalidate_org_hierarchy()
+
+        tasks_by_user = defaultdict(list)
+        tasks_by_project = defaultdict(list)
+        for task in tasks:
+            tasks_by_user[task.assigned_to_id].append(task.id)
+            tasks_by_project[task.project_id].append(task.id)
+        # Teams whose manager owns no project are staffed onto another team's project
+        self.project_task_ids = [tasks_by_project[project_id] for project_id in sorted(tasks_by_project)]
+        self.project_of = {task.id: task.project_id for task in tasks + internal_tasks}
+        # task id -> [logged hours, last day worked]
+        self.task_totals = defaultdict(lambda: [0.0, None])
+
+        done = 0
+        for batch in _chunks(list(enumerate(employees)), options["user_batch"]):
+            with transaction.atomic():
+                self.create_history(batch, tasks_by_user, [task.id for task in internal_tasks])
+            done += len(batch)
+            self.report(f"history for {done}/{len(employees)} employees")
+
+        self.finish_tasks(projects, tasks + internal_tasks)
+        snapshots = rebuild_employee_snapshots([user.id for user in employees])
+        self.report(f"{snapshots} employee snapshots")
+
+        if options["recompute"]:
+            call_command("recompute_performance", projects=[project.id for project in projects], workers=options["workers"], stdout=self.stdout)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(managers)} managers, {len(employees)} employees, {len(projects)} projects and "
+            f"{self.rows} rows in {elapsed:.1f}s ({self.rows / elapsed if elapsed else self.rows:.0f} rows/s)"
+        ))
+
+    # === Organisation ===
+
+    def create_org(self, rng, employee_count, team_size, password):
+        """One head of department, a manager per team and the employees, all sharing one password hash."""
+        password = make_password(password)
+        manager_count = math.ceil(employee_count / team_size)
+
+        def person(username):
+            first = rng.choice(["Alex", "Sam", "Jordan", "Priya", "Chen", "Fatima", "Ola", "Maria", "Tom", "Aisha"])
+            last = rng.choice(["Smith", "Khan", "Jones", "Patel", "Nowak", "Garcia", "Brown", "Okafor", "Li", "Evans"])
+            return User(username=username, first_name=first, last_name=last, email=f"{username}@example.com", password=password)
+
+        head = person(f"{self.prefix}_head")
+        head.save()
+        managers = self.bulk_create(User, [person(f"{self.prefix}_manager_{i:04d}") for i in range(manager_count)])
+        employees = self.bulk_create(User, [person(f"{self.prefix}_employee_{i:06d}") for i in range(employee_count)])
+
+        roles = [UserRole(user=head, role="manager")]
+        roles += [UserRole(user=manager, role="manager", manager=head) for manager in managers]
+        roles += [UserRole(user=employee, role="employee", manager=managers[i // team_size]) for i, employee in enumerate(employees)]
+        self.bulk_create(UserRole, roles)
+
+        self.manager_of = {employee.id: managers[i // team_size].id for i, employee in enumerate(employees)}
+        self.report(f"{1 + len(managers)} managers and {len(employees)} employees")
+        return [head] + managers, employees
+
+    def create_projects(self, rng, managers, employees, project_count, tasks_per_project):
+        """Client projects owned by team managers, with tasks assigned inside the owning team, plus shared internal tasks."""
+        first_week = self.weeks[0]
+        team_managers = managers[1:]
+        projects = []
+        for i in range(project_count):
+            start = first_week - timedelta(days=rng.randint(0, 180))
+            projects.append(Project(
+                project_name=f"{self.prefix} project {i:04d}",
+                description="Generated load-test project",
+                manager_id=team_managers[i % len(team_managers)].id,
+                start_date=start,
+                end_date=start + timedelta(weeks=rng.randint(26, 130)),
+                budget=float(rng.randrange(20000, 400000, 1000)),
+                hourly_rate=float(rng.randrange(60, 160, 5)),
+            ))
+        internal = Project(
+            project_name=f"{self.prefix} internal",
+            description="Meetings, training and admin",
+            manager_id=managers[0].id,
+            is_internal=True,
+            is_billable=False,
+        )
+        projects = self.bulk_create(Project, projects + [internal])
+
+        team = defaultdict(list)
+        for employee in employees:
+            team[self.manager_of[employee.id]].append(employee.id)
+
+        tasks = []
+        for project in projects[:-1]:
+            members = team[project.manager_id]
+            for j in range(tasks_per_project):
+                tasks.append(Task(
+                    project_id=project.id,
+                    name=f"{project.project_name} task {j:03d}",
+                    description="Generated load-test task",
+                    category=rng.choice(["Development", "Design", "Testing", "Support"]),
+                    assigned_to_id=rng.choice(members),
+                    estimated_hours=float(rng.randrange(8, 120, 4)),
+                    due_date=project.start_date + timedelta(weeks=rng.randint(4, 52)),
+                ))
+        internal_tasks = [
+            Task(project_id=projects[-1].id, name=f"{self.prefix} {category}", category=category,
+                 is_billable=False, requires_assignment=False)
+            for category in ADMIN_CATEGORIES
+        ]
+        tasks = self.bulk_create(Task, tasks)
+        internal_tasks = self.bulk_create(Task, internal_tasks)
+        self.report(f"{len(projects)} projects and {len(tasks) + len(internal_tasks)} tasks")
+        return projects, tasks, internal_tasks
+
+    # === History ===
+
+    def create_history(self, batch, tasks_by_user, internal_task_ids):
+        """Leave and timesheets for a batch of (index, employee); each employee has its own seeded generator."""
+        leaves, timesheets, day_plans = [], [], []
+        last_pending_week = self.weeks[-1] - timedelta(weeks=1)
+
+        for index, employee in batch:
+            rng = random.Random(f"{self.seed}:{index}")
+            leave_days = set()
+            for _ in range(max(1, len(self.weeks) // 12)):
+                start = self.weeks[0] + timedelta(days=rng.randint(0, 7 * len(self.weeks) + 28))
+                end = start + timedelta(days=rng.choice(LEAVE_LENGTHS) - 1)
+                if start > self.weeks[-1]:
+                    status = "pending"
+                else:
+                    status = rng.choices(["approved", "rejected", "pending"], [8, 1, 1])[0]
+                if status == "approved":
+                    leave_days.update(start + timedelta(days=offset) for offset in range((end - start).days + 1))
+                leaves.append(LeaveRequest(
+                    user_id=employee.id, leave_type=rng.choice(LEAVE_TYPES),
+                    start_date=start, end_date=end, reason="Generated", status=status,
+                ))
+
+            own_tasks = tasks_by_user.get(employee.id) or rng.choice(self.project_task_ids)
+            for week_start in self.weeks:
+                if rng.random() < 0.03:
+                    continue  # forgot to submit
+                days = self.plan_week(rng, week_start, leave_days, own_tasks, internal_task_ids)
+                if not days:
+                    continue
+
+                total = sum(hours for _, _, entries in days for _, hours in entries)
+                if week_start >= last_pending_week:
+                    status = "Pending"
+                else:
+                    status = rng.choices(["Approved", "Rejected", "Pending"], [90, 5, 5])[0]
+                timesheets.append(Timesheet(
+                    user_id=employee.id,
+                    manager_id=self.manager_of[employee.id] if status != "Pending" else None,
+                    week_start_date=week_start,
+                    total_hours=total,
+                    overtime_hours=max(total - 40.0, 0.0),
+                    approval_status=status,
+                    rejection_reason=rng.choice(REJECTION_REASONS) if status == "Rejected" else None,
+                ))
+                day_plans.append(days)
+
+        self.bulk_create(LeaveRequest, leaves)
+        timesheets = self.bulk_create(Timesheet, timesheets)
+
+        logs, log_entries = [], []
+        for timesheet, days in zip(timesheets, day_plans):
+            for day, start, entries in days:
+                worked = sum(hours for _, hours in entries)
+                end = datetime.combine(day, start) + timedelta(hours=worked + 0.5)
+                logs.append(DailyLog(timesheet_id=timesheet.id, date=day, start_time=start, end_time=end.time()))
+                log_entries.append(entries)
+        logs = self.bulk_create(DailyLog, logs)
+
+        task_entries = []
+        project_links = set()
+        for log, entries in zip(logs, log_entries):
+            for task_id, hours in entries:
+                task_entries.append(TaskEntry(daily_log_id=log.id, task_id=task_id, duration=hours))
+                project_links.add((log.timesheet_id, self.project_of[task_id]))
+                totals = self.task_totals[task_id]
+                totals[0] += hours
+                totals[1] = max(totals[1] or log.date, log.date)
+        self.bulk_create(TaskEntry, task_entries)
+
+        through = Timesheet.projects.through
+        self.bulk_create(through, [through(timesheet_id=timesheet_id, project_id=project_id) for timesheet_id, project_id in project_links])
+
+    def plan_week(self, rng, week_start, leave_days, own_tasks, internal_task_ids):
+        """[(day, start time, [(task_id, hours), ...]), ...] for the working days of one week."""
+        days = []
+        for offset in range(5):
+            day = week_start + timedelta(days=offset)
+            if not is_working_day(day) or day in leave_days:
+                continue
+
+            hours = min(max(round(rng.gauss(8.0, 0.8) * 4) / 4, 4.0), 11.0)
+            task_ids = rng.sample(own_tasks, rng.randint(1, min(3, len(own_tasks))))
+            if rng.random() < 0.3:
+                task_ids.append(rng.choice(internal_task_ids))
+            task_ids = list(dict.fromkeys(task_ids))
+            start = clock(8, 0) if rng.random() < 0.2 else clock(9, rng.choice([0, 15, 30]))
+            days.append((day, start, list(zip(task_ids, _split_hours(rng, hours, len(task_ids))))))
+        return days
+
+    def finish_tasks(self, projects, tasks):
+        """Write the logged hours the bulk inserts skipped, and derive task status and project progress from them."""
+        hours_by_project = defaultdict(float)
+        for task in tasks:
+            logged, last_day = self.task_totals.get(task.id, (0.0, None))
+            task.logged_hours = logged
+            hours_by_project[task.project_id] += logged
+            if task.requires_assignment and logged >= task.estimated_hours > 0:
+                task.status, task.completed_on = "Completed", last_day
+            elif logged:
+                task.status = "In Progress"
+        Task.objects.bulk_update(tasks, ["logged_hours", "status", "completed_on"], batch_size=self.chunk_size)
+
+        estimated = defaultdict(float)
+        for task in tasks:
+            estimated[task.project_id] += task.estimated_hours
+        for project in projects:
+            project.completed_hours = hours_by_project[project.id]
+            project.outstanding_hours = max(estimated[project.id] - project.completed_hours, 0.0)
+        Project.objects.bulk_update(projects, ["completed_hours", "outstanding_hours"], batch_size=self.chunk_size)
+        self.report(f"logged hours for {len(tasks)} tasks")
+
+    # === Helpers ===
+
+    def bulk_create(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=self.chunk_size)
+        self.rows += len(created)
+        return created
+
+    def report(self, message):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f"  {message} ({self.rows} rows, {self.rows / elapsed if elapsed else self.rows:.0f} rows/s)")
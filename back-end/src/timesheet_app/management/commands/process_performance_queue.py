@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from timesheet_app.utils.performance_queue import process_performance_batch
+
+
+class Command(BaseCommand):
+    help = "Drain the performance recompute queue filled by timesheet submissions and approvals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Dirty keys claimed per transaction")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting once the queue is empty")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait between polls when --loop is set")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if isinstance(caches["default"], LocMemCache):
+            # Cache versions bumped here never reach the web processes' own memory caches
+            self.stderr.write(self.style.WARNING(
+                "The default cache is process-local; set CACHE_REDIS_URL so the web processes see "
+                "recomputed performance before PERFORMANCE_CACHE_TIMEOUT expires."
+            ))
+
+        while True:
+            processed = 0
+            started = time.monotonic()
+            while True:
+                count = process_performance_batch(batch_size)
+                if not count:
+                    break
+                processed += count
+
+            if processed:
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} dirty keys in {elapsed:.2f}s"))
+
+            if not options["loop"]:
+                return
+            time.sleep(options["sleep"])
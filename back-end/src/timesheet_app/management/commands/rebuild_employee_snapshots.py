@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from timesheet_app.utils.employee_snapshot import rebuild_employee_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized all-time employee snapshots from timesheet history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, nargs="+", help="Only rebuild these user ids")
+
+    def handle(self, *args, **options):
+        count = rebuild_employee_snapshots(options["users"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} employee snapshots"))
@@ -0,0 +1,153 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_date
+
+from timesheet_app.models import Project, Task, Timesheet
+from timesheet_app.utils.performance_calculator import (
+    calculate_employee_performances,
+    calculate_project_performances,
+    calculate_task_efficiencies,
+)
+
+KIND_TASKS = "tasks"
+KIND_PROJECTS = "projects"
+KIND_EMPLOYEE_WEEKS = "employee weeks"
+
+
+# === Worker Side ===
+
+def _init_worker():
+    # Forked children inherit the parent's sockets; drop them so each worker opens its own connection
+    django.setup()
+    connections.close_all()
+
+
+def recompute_shard(kind, keys):
+    """Recompute one shard of work. Runs inside a pool worker (or inline with one worker)."""
+    if kind == KIND_TASKS:
+        calculate_task_efficiencies(keys)
+    elif kind == KIND_PROJECTS:
+        calculate_project_performances(keys)
+    else:
+        calculate_employee_performances(keys)
+    return kind, len(keys)
+
+
+# === Scope & Sharding ===
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _employee_week_shards(employee_weeks, size):
+    """Keep every week of a user in one shard so utilization trends read the fresh previous week."""
+    weeks_by_user = defaultdict(list)
+    for user_id, week_start_date in employee_weeks:
+        weeks_by_user[user_id].append((user_id, week_start_date))
+
+    shards = []
+    current = []
+    for user_id in sorted(weeks_by_user):
+        current.extend(weeks_by_user[user_id])
+        if len(current) >= size:
+            shards.append(current)
+            current = []
+    if current:
+        shards.append(current)
+    return shards
+
+
+class Command(BaseCommand):
+    help = "Recompute TaskEfficiency, ProjectPerformance and EmployeePerformance rows, sharded across worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only tasks updated and timesheet weeks starting on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--projects", type=int, nargs="+", help="Only these project ids (and their tasks and contributors)")
+        parser.add_argument("--users", type=int, nargs="+", help="Only these user ids (and the tasks and projects assigned to them)")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes; 1 runs everything in this process")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows handed to a worker at a time")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        shards = self.build_shards(since, options["projects"], options["users"], options["batch_size"])
+        totals = defaultdict(int)
+        for kind, keys in shards:
+            totals[kind] += len(keys)
+
+        if not shards:
+            self.stdout.write(self.style.SUCCESS("Nothing to recompute"))
+            return
+
+        self.stdout.write(
+            f"Recomputing {totals[KIND_TASKS]} tasks, {totals[KIND_PROJECTS]} projects and "
+            f"{totals[KIND_EMPLOYEE_WEEKS]} employee weeks in {len(shards)} shards "
+            f"with {options['workers']} worker(s)"
+        )
+
+        started = time.monotonic()
+        done = defaultdict(int)
+
+        if options["workers"] == 1:
+            for kind, keys in shards:
+                self.report(*recompute_shard(kind, keys), done, totals, started)
+        else:
+            # Children must not share the parent's connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+                futures = [pool.submit(recompute_shard, kind, keys) for kind, keys in shards]
+                for future in as_completed(futures):
+                    self.report(*future.result(), done, totals, started)
+
+        elapsed = time.monotonic() - started
+        rows = sum(done.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else rows:.0f} rows/s)"
+        ))
+
+    def build_shards(self, since, project_ids, user_ids, batch_size):
+        projects = Project.objects.all()
+        tasks = Task.objects.all()
+        timesheets = Timesheet.objects.all()
+
+        if project_ids:
+            projects = projects.filter(id__in=project_ids)
+            tasks = tasks.filter(project_id__in=project_ids)
+            timesheets = timesheets.filter(daily_logs__task_entries__task__project_id__in=project_ids)
+        if user_ids:
+            projects = projects.filter(tasks__assigned_to_id__in=user_ids)
+            tasks = tasks.filter(assigned_to_id__in=user_ids)
+            timesheets = timesheets.filter(user_id__in=user_ids)
+        if since:
+            projects = projects.filter(tasks__updated_at__date__gte=since)
+            tasks = tasks.filter(updated_at__date__gte=since)
+            timesheets = timesheets.filter(week_start_date__gte=since)
+
+        task_ids = list(tasks.order_by("id").values_list("id", flat=True))
+        project_ids = list(projects.order_by("id").values_list("id", flat=True).distinct())
+        employee_weeks = list(timesheets.order_by().values_list("user_id", "week_start_date").distinct())
+
+        shards = [(KIND_TASKS, chunk) for chunk in _chunks(task_ids, batch_size)]
+        shards += [(KIND_PROJECTS, chunk) for chunk in _chunks(project_ids, batch_size)]
+        shards += [(KIND_EMPLOYEE_WEEKS, chunk) for chunk in _employee_week_shards(employee_weeks, batch_size)]
+        return shards
+
+    def report(self, kind, count, done, totals, started):
+        done[kind] += count
+        elapsed = time.monotonic() - started
+        rows = sum(done.values())
+        self.stdout.write(
+            f"  {kind}: {done[kind]}/{totals[kind]} "
+            f"({rows / elapsed if elapsed else rows:.0f} rows/s overall)"
+        )
@@ -0,0 +1,70 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from timesheet_app.utils.request_metrics import finish_request_metrics, record_sample, start_request_metrics
+
+logger = logging.getLogger("timesheet_app.requests")
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time, slowest statements, timing spans and response
+    size for every request. The numbers are sent back as a Server-Timing
+    header, logged as one JSON line and kept in a rolling per-endpoint sample.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics, token = start_request_metrics()
+        request._request_metrics = metrics
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all(initialized_only=True) or [connections["default"]]:
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+
+        duration_ms = metrics.elapsed() * 1000
+        db_ms = metrics.db_seconds * 1000
+        size = None if response.streaming else len(response.content)
+
+        timings = [f'db;dur={db_ms:.2f};desc="{metrics.query_count} queries"']
+        timings += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in metrics.spans.items()]
+        timings.append(f"total;dur={duration_ms:.2f}")
+        response["Server-Timing"] = ", ".join(timings)
+
+        match = request.resolver_match
+        endpoint = f"{request.method} /{match.route}" if match else f"{request.method} <unresolved>"
+        record_sample(endpoint, duration_ms, metrics.query_count, db_ms)
+
+        logger.info(json.dumps({
+            "endpoint": endpoint,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "queries": metrics.query_count,
+            "db_ms": round(db_ms, 2),
+            "spans_ms": {name: round(seconds * 1000, 2) for name, seconds in metrics.spans.items()},
+            "response_bytes": size,
+            "slowest_queries": metrics.slowest(),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that as its own span
+        metrics = getattr(request, "_request_metrics", None)
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def record_render(rendered):
+                metrics.spans["render"] += time.perf_counter() - started
+
+            response.add_post_render_callback(record_render)
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0030_projectperformance_project_budget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceDirtyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('project', 'Project'), ('employee_week', 'Employee Week')], max_length=20)),
+                ('object_id', models.BigIntegerField(help_text='Task, project or user id depending on kind')),
+                ('week_start_date', models.DateField(blank=True, help_text='Only set for employee weeks', null=True)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
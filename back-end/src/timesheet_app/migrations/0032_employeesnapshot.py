@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0031_performancedirtykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_hours', models.FloatField(default=0.0)),
+                ('productive_hours', models.FloatField(default=0.0)),
+                ('admin_hours', models.FloatField(default=0.0)),
+                ('task_count', models.IntegerField(default=0, help_text='Task entries logged across all timesheets')),
+                ('timesheet_count', models.IntegerField(default=0)),
+                ('active_days', models.IntegerField(default=0, help_text='Days with at least one task entry')),
+                ('project_time_allocation', models.JSONField(blank=True, default=dict, help_text='All-time hours per project (project_id: hours)')),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='performance_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
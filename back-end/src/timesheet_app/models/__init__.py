@@ -1,8 +1,10 @@
 from .project_model import Project
 from .timesheet_model import Timesheet, DailyLog, TaskEntry
 
-from.user_model import UserRole
+from.user_model import UserRole, ClaimsUser
 from .task_model import Task
 from .performance_model import ProjectPerformance
 from .performance_model import EmployeePerformance
-from.performance_model import TaskEfficiency
\ No newline at end of file
+from.performance_model import TaskEfficiency
+from .performance_model import EmployeeSnapshot
+from .performance_queue_model import PerformanceDirtyKey
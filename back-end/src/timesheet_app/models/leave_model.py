@@ -26,6 +26,11 @@ class LeaveRequest(models.Model):
     manager_comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status", "start_date", "end_date"], name="leave_user_status_range_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.leave_type} ({self.status})"
 
@@ -78,3 +78,21 @@ class TaskEfficiency(models.Model):
 
     def __str__(self):
         return f"{self.task.name} efficiency"
+
+
+class EmployeeSnapshot(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="performance_snapshot")
+
+    total_hours = models.FloatField(default=0.0)
+    productive_hours = models.FloatField(default=0.0)
+    admin_hours = models.FloatField(default=0.0)
+
+    task_count = models.IntegerField(default=0, help_text="Task entries logged across all timesheets")
+    timesheet_count = models.IntegerField(default=0)
+    active_days = models.IntegerField(default=0, help_text="Days with at least one task entry")
+    project_time_allocation = models.JSONField(default=dict, blank=True, help_text="All-time hours per project (project_id: hours)")
+
+    last_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} snapshot"
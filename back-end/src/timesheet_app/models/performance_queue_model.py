@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class PerformanceDirtyKey(models.Model):
+    """
+    A task, project or employee-week whose performance figures are stale.
+    Rows are appended on timesheet submission/approval and drained by the
+    `process_performance_queue` management command.
+    """
+    KIND_TASK = 'task'
+    KIND_PROJECT = 'project'
+    KIND_EMPLOYEE_WEEK = 'employee_week'
+
+    KIND_CHOICES = [
+        (KIND_TASK, 'Task'),
+        (KIND_PROJECT, 'Project'),
+        (KIND_EMPLOYEE_WEEK, 'Employee Week'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField(help_text="Task, project or user id depending on kind")
+    week_start_date = models.DateField(null=True, blank=True, help_text="Only set for employee weeks")
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        if self.week_start_date:
+            return f"{self.kind} {self.object_id} ({self.week_start_date})"
+        return f"{self.kind} {self.object_id}"
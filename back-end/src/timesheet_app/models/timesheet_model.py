@@ -1,9 +1,29 @@
 from django.db import models
+from django.db.models import Sum
 from django.contrib.auth.models import User
 from datetime import datetime, date
 from .project_model import Project
 from .task_model import Task
 
+class TimesheetQuerySet(models.QuerySet):
+    def with_full_detail(self):
+        """
+        Load everything TimesheetSerializer touches up front: owner, role and
+        line manager, approving manager, then logs -> entries -> task, project
+        and assignee. Query count stays the same however many rows come back.
+        """
+        task_entries = TaskEntry.objects.select_related("task__project", "task__assigned_to")
+        daily_logs = DailyLog.objects.prefetch_related(models.Prefetch("task_entries", queryset=task_entries))
+        return self.select_related(
+            "user",
+            "user__userrole",
+            "user__userrole__manager",
+            "manager",
+        ).prefetch_related(
+            models.Prefetch("daily_logs", queryset=daily_logs),
+        )
+
+
 class Timesheet(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -20,20 +40,19 @@ class Timesheet(models.Model):
     approval_status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     rejection_reason = models.TextField(blank=True, null=True)
 
-    def update_hours(self):
-        total = 0.0
-        overtime = 0.0
+    objects = TimesheetQuerySet.as_manager()
 
-        for log in self.daily_logs.all():
-            for task_entry in log.task_entries.all():
-                total += task_entry.duration
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "week_start_date"], name="timesheet_user_week_idx"),
+        ]
 
-        regular = min(total, 40.0)
-        overtime = max(total - 40.0, 0.0)
+    def update_hours(self):
+        total = TaskEntry.objects.filter(daily_log__timesheet=self).aggregate(total=Sum("duration"))["total"] or 0.0
 
         self.total_hours = total
-        self.overtime_hours = overtime
-        self.save()
+        self.overtime_hours = max(total - 40.0, 0.0)
+        self.save(update_fields=["total_hours", "overtime_hours"])
 
     def __str__(self):
         return f"{self.user.username} - {self.week_start_date}"
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
 from django.db import models
 
 class UserRole(models.Model):
@@ -20,3 +21,28 @@ class UserRole(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.role}"
+
+
+class ClaimsUser(User):
+    """
+    A User known only by the claims of its access token. The row is loaded the
+    first time a view reads a field other than the id, all fields at once.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, role=None):
+        user = cls.from_db(None, ["id"], [user_id])
+        user.role = role
+        return user
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        try:
+            super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        except self.DoesNotExist:
+            raise PermissionDenied("The user of this token no longer exists.")
@@ -0,0 +1,30 @@
+from rest_framework.permissions import BasePermission
+
+from timesheet_app.utils.org_hierarchy import role_of
+
+
+def request_role(request):
+    """The caller's role from their token claims, falling back to the cached org hierarchy."""
+    role = getattr(request.user, "role", None)
+    if role is None:
+        role = role_of(request.user.id, request)
+    return role
+
+
+class HasRole(BasePermission):
+    role = None
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request_role(request) == self.role)
+
+
+class IsManager(HasRole):
+    role = "manager"
+
+
+class IsEmployee(HasRole):
+    role = "employee"
+
+
+class IsAdmin(HasRole):
+    role = "admin"
@@ -3,7 +3,7 @@ from django.utils import timezone
 from datetime import timedelta, datetime
 import random
 
-from timesheet_app.utils.performance_calculator import calculate_project_performance
+from timesheet_app.utils.performance_calculator import calculate_project_performances
 
 
 def seed_missing_project_fields():
@@ -11,7 +11,7 @@ def seed_missing_project_fields():
 
     projects = Project.objects.all()
     today = timezone.now().date()
-    updated_count = 0
+    updated_projects = []
 
     for project in projects:
         updated = False
@@ -52,10 +52,15 @@ def seed_missing_project_fields():
             updated = True
 
         if updated:
-            project.save()
-            calculate_project_performance(project)
-            updated_count += 1
+            updated_projects.append(project)
             print(f" Updated project: {project.project_name} (ID: {project.id})")
 
-    print(f"\n Total projects updated: {updated_count}")
+    Project.objects.bulk_update(
+        updated_projects,
+        ["start_date", "end_date", "completed_hours", "outstanding_hours"],
+        batch_size=500,
+    )
+    calculate_project_performances([project.id for project in updated_projects])
+
+    print(f"\n Total projects updated: {len(updated_projects)}")
     print("Field population complete.")
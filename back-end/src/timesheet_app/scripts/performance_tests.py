@@ -5,7 +5,7 @@ from django.contrib.auth.models import User
 from timesheet_app.utils.performance_calculator import (
     calculate_employee_performance,
     calculate_project_performance,
-    calculate_task_efficiency,
+    calculate_task_efficiencies,
 )
 from datetime import timedelta, date, datetime, time
 
@@ -57,6 +57,7 @@ def seed_performance_data():
     ]
 
     created_projects = []
+    task_ids = []
 
     for proj in projects:
         p, _ = Project.objects.get_or_create(
@@ -92,8 +93,9 @@ def seed_performance_data():
                 t.logged_hours = random.uniform(3.5, 12.0)
                 t.save()
 
-            calculate_task_efficiency(t)
+            task_ids.append(t.id)
 
+    calculate_task_efficiencies(task_ids)
     print("Tasks created and efficiencies calculated.")
 
 
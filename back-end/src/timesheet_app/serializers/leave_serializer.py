@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from timesheet_app.models.leave_model import LeaveRequest
-from datetime import timedelta, date
-import holidays
+from timesheet_app.utils.calendar import working_days_between
 
 class LeaveRequestSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,20 +15,8 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
         if start_date > end_date:
             raise serializers.ValidationError("Start date must be before end date.")
 
-        # Handle leaves that span multiple years
-        years = set(range(start_date.year, end_date.year + 1))
-        uk_holidays = []
-        for y in years:
-            uk_holidays.extend(holidays.UnitedKingdom(years=y).keys())
-
-        # Calculate valid leave days (exclude weekends and public holidays)
-        current_day = start_date
-        valid_leave_days = 0
-
-        while current_day <= end_date:
-            if current_day.weekday() < 5 and current_day not in uk_holidays:
-                valid_leave_days += 1
-            current_day += timedelta(days=1)
+        # Exclude weekends and public holidays
+        valid_leave_days = working_days_between(start_date, end_date)
 
         if valid_leave_days == 0:
             raise serializers.ValidationError("Leave cannot consist solely of weekends or public holidays.")
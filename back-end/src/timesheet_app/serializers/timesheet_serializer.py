@@ -1,20 +1,27 @@
 
 from rest_framework import serializers
 from dateutil.parser import parse
-import holidays
 from timesheet_app.models.timesheet_model import Timesheet, DailyLog, TaskEntry
 from timesheet_app.models.leave_model import LeaveRequest
 from timesheet_app.models.task_model import Task
 from timesheet_app.serializers.project_serializer import ProjectSerializer
 from timesheet_app.serializers.task_serializer import TaskSerializer
-from timesheet_app.utils.performance_calculator import calculate_employee_performance, calculate_project_performance,calculate_task_efficiency
+from timesheet_app.utils.performance_queue import enqueue_performance_recompute
+from timesheet_app.utils.calendar import is_uk_holiday
+from timesheet_app.utils.employee_snapshot import apply_snapshot_delta, timesheet_hours_summary
+from timesheet_app.utils.task_hours import apply_logged_hours_deltas, logged_hours_deltas
+from collections import Counter
 from datetime import timedelta, datetime
 from django.contrib.auth.models import User
+from django.db import transaction
 
 
 class TaskEntrySerializer(serializers.ModelSerializer):
     task = TaskSerializer(read_only=True)
-    task_id = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all(), source='task', write_only=True)
+    # Optional on write: lets an update keep the existing row instead of replacing it
+    id = serializers.IntegerField(required=False)
+    # Resolved in bulk by TimesheetSerializer.validate instead of one SELECT per entry
+    task_id = serializers.IntegerField(write_only=True)
 
     project_name = serializers.CharField(source="task.project.project_name", read_only=True)
     project_id = serializers.IntegerField(source="task.project.id", read_only=True)
@@ -32,12 +39,27 @@ class DailyLogSerializer(serializers.ModelSerializer):
         model = DailyLog
         fields = ['id', 'date', 'start_time', 'end_time', 'task_entries']
 
-    def create(self, validated_data):
-        tasks_data = validated_data.pop('task_entries')
-        daily_log = DailyLog.objects.create(**validated_data)
-        for task_data in tasks_data:
-            TaskEntry.objects.create(daily_log=daily_log, **task_data)
-        return daily_log
+class TimesheetSummarySerializer(serializers.Serializer):
+    """
+    Flat header-only representation for list pages. Reads dict rows from
+    `Timesheet.objects.values(*TimesheetSummarySerializer.source_fields)`.
+    """
+    source_fields = [
+        "id", "user_id", "user__first_name", "user__last_name",
+        "week_start_date", "total_hours", "overtime_hours", "approval_status",
+    ]
+
+    id = serializers.IntegerField()
+    user_id = serializers.IntegerField()
+    submitted_by = serializers.SerializerMethodField()
+    week_start_date = serializers.DateField()
+    total_hours = serializers.FloatField()
+    overtime_hours = serializers.FloatField()
+    approval_status = serializers.CharField()
+
+    def get_submitted_by(self, row):
+        return f"{row['user__first_name']} {row['user__last_name']}"
+
 
 class TimesheetSerializer(serializers.ModelSerializer):
     projects = ProjectSerializer(many=True, read_only=True)
@@ -119,27 +141,42 @@ class TimesheetSerializer(serializers.ModelSerializer):
         if len(logs) > 5:
             raise serializers.ValidationError("You can only submit logs for 5 working days.")
 
-        uk_holidays = holidays.UnitedKingdom()
+        log_dates = [log["date"] for log in logs]
+        duplicates = sorted(log_date for log_date, count in Counter(log_dates).items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Only one daily log per day is allowed: {', '.join(map(str, duplicates))}")
+
         for log in logs:
             log_date = log["date"]
+            if not week_start <= log_date < week_start + timedelta(days=7):
+                raise serializers.ValidationError(f"{log_date} is outside the week starting {week_start}.")
             if log_date.weekday() >= 5:
                 raise serializers.ValidationError(f"{log_date} falls on a weekend.")
-            if log_date in uk_holidays:
+            if is_uk_holiday(log_date):
                 raise serializers.ValidationError(f"{log_date} is a UK public holiday")
 
-      
-        approved_leave = LeaveRequest.objects.filter(user=user, status='approved')
-        leave_days = set()
-        for leave in approved_leave:
-            current = leave.start_date
-            while current <= leave.end_date:
-                leave_days.add(current)
-                current += timedelta(days=1)
+        # Only approved leave overlapping the submitted dates can clash
+        approved_leave = list(LeaveRequest.objects.filter(
+            user=user,
+            status='approved',
+            start_date__lte=max(log_dates),
+            end_date__gte=min(log_dates),
+        ))
 
         for log in logs:
-            if log["date"] in leave_days:
+            if any(leave.start_date <= log["date"] <= leave.end_date for leave in approved_leave):
                 raise serializers.ValidationError(f"{log['date']} is during an approved leave. You cannot log work on this day.")
 
+        task_ids = {entry["task_id"] for log in logs for entry in log["task_entries"]}
+        tasks = Task.objects.select_related("project").in_bulk(task_ids)
+        missing = sorted(task_ids - tasks.keys())
+        if missing:
+            raise serializers.ValidationError(f"Invalid task id(s): {', '.join(str(i) for i in missing)}")
+
+        for log in logs:
+            for entry in log["task_entries"]:
+                entry["task"] = tasks[entry.pop("task_id")]
+
         existing = Timesheet.objects.filter(user=user, week_start_date=week_start)
         instance = getattr(self, 'instance', None)
         if instance is not None:
@@ -159,78 +196,165 @@ class TimesheetSerializer(serializers.ModelSerializer):
         return data
 
 
-    def create(self, validated_data):
-
-        logs_data = validated_data.pop("daily_logs")
-        validated_data["user"] = self.context["request"].user
-
-        timesheet = Timesheet.objects.create(**validated_data)
-        touched_projects = set()
-        touched_tasks= []
+    def _write_daily_logs(self, timesheet, logs_data):
+        """
+        Insert every DailyLog and TaskEntry of a submission with two bulk INSERTs.
+        Tasks (and their projects) were already resolved in validate(), so no
+        further lookups are needed. Returns the distinct touched tasks and projects.
+        """
+        daily_logs = []
+        entries_per_log = []
+        for log_data in logs_data:
+            entries_per_log.append(log_data.pop("task_entries"))
+            daily_logs.append(DailyLog(timesheet=timesheet, **log_data))
 
+        DailyLog.objects.bulk_create(daily_logs)
 
+        task_entries = [
+            TaskEntry(daily_log=daily_log, task=entry["task"], duration=entry["duration"])
+            for daily_log, entries in zip(daily_logs, entries_per_log)
+            for entry in entries
+        ]
+        TaskEntry.objects.bulk_create(task_entries)
+        apply_logged_hours_deltas(logged_hours_deltas(added=[(e.task_id, e.duration) for e in task_entries]))
+
+        touched_tasks = {}
+        touched_projects = {}
+        for task_entry in task_entries:
+            task = task_entry.task
+            touched_tasks[task.id] = task
+            if task.project:
+                touched_projects[task.project_id] = task.project
+
+        return list(touched_tasks.values()), list(touched_projects.values())
+
+    def _diff_daily_logs(self, timesheet, logs_data):
+        """
+        Apply an edited submission to an existing timesheet, touching only rows
+        that changed. Logs are matched by date; entries by id, or failing that
+        by task within the same log. Inserts, updates and deletes are each done
+        in bulk. Returns the ids of tasks and projects whose hours changed.
+        """
+        existing_logs = {log.date: log for log in timesheet.daily_logs.all()}
+        existing_entries = {
+            entry.id: entry
+            for entry in TaskEntry.objects.filter(daily_log__timesheet=timesheet).select_related("task")
+        }
+        unclaimed_by_log_task = {}
+        for entry in existing_entries.values():
+            unclaimed_by_log_task.setdefault((entry.daily_log_id, entry.task_id), []).append(entry)
+
+        changed_tasks = {}
+        logs_to_create = []
+        logs_to_update = []
+        incoming = []
         for log_data in logs_data:
-            tasks_data = log_data.pop('task_entries')
-            daily_log = DailyLog.objects.create(timesheet=timesheet, **log_data)
-            for task in tasks_data:
-                task_entry = TaskEntry.objects.create(daily_log=daily_log, **task)
-                touched_tasks.append(task_entry.task)
-                if task_entry.task.project:
-                    touched_projects.add(task_entry.task.project)
+            entries_data = log_data.pop("task_entries")
+            daily_log = existing_logs.pop(log_data["date"], None)
+            if daily_log is None:
+                daily_log = DailyLog(timesheet=timesheet, **log_data)
+                logs_to_create.append(daily_log)
+            elif (daily_log.start_time, daily_log.end_time) != (log_data["start_time"], log_data["end_time"]):
+                daily_log.start_time = log_data["start_time"]
+                daily_log.end_time = log_data["end_time"]
+                logs_to_update.append(daily_log)
+            incoming.append((daily_log, entries_data))
+
+        DailyLog.objects.bulk_create(logs_to_create)
+        DailyLog.objects.bulk_update(logs_to_update, ["start_time", "end_time"])
+
+        claimed = set()
+        entries_to_create = []
+        entries_to_update = []
+        hours_added = []
+        hours_removed = []
+        for daily_log, entries_data in incoming:
+            for entry_data in entries_data:
+                task = entry_data["task"]
+                entry = existing_entries.get(entry_data.get("id"))
+                if entry is None or entry.id in claimed:
+                    candidates = unclaimed_by_log_task.get((daily_log.id, task.id), [])
+                    entry = next((c for c in candidates if c.id not in claimed), None)
+
+                if entry is None:
+                    entries_to_create.append(TaskEntry(daily_log=daily_log, task=task, duration=entry_data["duration"]))
+                    hours_added.append((task.id, entry_data["duration"]))
+                    changed_tasks[task.id] = task.project_id
+                    continue
+
+                claimed.add(entry.id)
+                if (entry.daily_log_id, entry.task_id, entry.duration) != (daily_log.id, task.id, entry_data["duration"]):
+                    changed_tasks[entry.task_id] = entry.task.project_id
+                    changed_tasks[task.id] = task.project_id
+                    hours_removed.append((entry.task_id, entry.duration))
+                    hours_added.append((task.id, entry_data["duration"]))
+                    entry.daily_log = daily_log
+                    entry.task = task
+                    entry.duration = entry_data["duration"]
+                    entries_to_update.append(entry)
+
+        removed_entries = [entry for entry in existing_entries.values() if entry.id not in claimed]
+        for entry in removed_entries:
+            changed_tasks[entry.task_id] = entry.task.project_id
+            hours_removed.append((entry.task_id, entry.duration))
+
+        TaskEntry.objects.bulk_create(entries_to_create)
+        TaskEntry.objects.bulk_update(entries_to_update, ["daily_log", "task", "duration"])
+        TaskEntry.objects.filter(id__in=[entry.id for entry in removed_entries]).delete()
+        # Remaining logs had no matching date; their entries were moved or removed above
+        DailyLog.objects.filter(id__in=[log.id for log in existing_logs.values()]).delete()
+        apply_logged_hours_deltas(logged_hours_deltas(added=hours_added, removed=hours_removed))
+
+        return set(changed_tasks), set(changed_tasks.values())
 
+    def create(self, validated_data):
+        logs_data = validated_data.pop("daily_logs")
+        validated_data["user"] = self.context["request"].user
 
-        timesheet.update_hours()  
-        for task in touched_tasks:
-            calculate_task_efficiency(task)
-
-        for project in touched_projects:
-            calculate_project_performance(project)
+        with transaction.atomic():
+            timesheet = Timesheet.objects.create(**validated_data)
+            touched_tasks, touched_projects = self._write_daily_logs(timesheet, logs_data)
+            timesheet.projects.set(touched_projects)
+            timesheet.update_hours()
 
-        user = self.context["request"].user
-        calculate_employee_performance(user, validated_data["week_start_date"])        
+            apply_snapshot_delta(timesheet.user_id, added=timesheet_hours_summary(timesheet), timesheets=1)
 
+            enqueue_performance_recompute(
+                task_ids=[task.id for task in touched_tasks],
+                project_ids=[project.id for project in touched_projects],
+                employee_weeks=[(timesheet.user_id, timesheet.week_start_date)],
+            )
 
         return timesheet
     
 
     def update(self, instance, validated_data):
         logs_data = validated_data.pop("daily_logs", [])
+        previous_week = instance.week_start_date
 
-        # Reset status and rejection reason on update
-        instance.rejection_reason = ""
-        instance.approval_status = "Pending"
-        instance.week_start_date = validated_data.get("week_start_date", instance.week_start_date)
-        instance.save()
+        with transaction.atomic():
+            # Reset status and rejection reason on update
+            instance.rejection_reason = ""
+            instance.approval_status = "Pending"
+            instance.week_start_date = validated_data.get("week_start_date", instance.week_start_date)
+            instance.save()
 
-        # Delete old logs and task entries
-        instance.daily_logs.all().delete()
-        touched_projects = set()
-        touched_tasks= []
+            previous_summary = timesheet_hours_summary(instance)
+            changed_task_ids, changed_project_ids = self._diff_daily_logs(instance, logs_data)
 
+            # Recalculate hours
+            instance.update_hours()
 
+            apply_snapshot_delta(instance.user_id, added=timesheet_hours_summary(instance), removed=previous_summary)
 
-        # Re-create logs and task entries
-        for log_data in logs_data:
-            tasks_data = log_data.pop("task_entries")
-            daily_log = DailyLog.objects.create(timesheet=instance, **log_data)
-            
-
-            for task in tasks_data:
-
-                task_entry = TaskEntry.objects.create(daily_log=daily_log, **task)
-                touched_tasks.append(task_entry.task)
-                if task_entry.task.project:
-                    touched_projects.add(task_entry.task.project)
-        # Recalculate hours
-        instance.update_hours()
-        for task in touched_tasks:
-            calculate_task_efficiency(task)
+            employee_weeks = set()
+            if changed_task_ids or previous_week != instance.week_start_date:
+                employee_weeks = {(instance.user_id, previous_week), (instance.user_id, instance.week_start_date)}
 
-        for project in touched_projects:
-            calculate_project_performance(project)
-
-        user = self.context["request"].user
-        calculate_employee_performance(user, validated_data["week_start_date"])        
+            enqueue_performance_recompute(
+                task_ids=changed_task_ids,
+                project_ids=changed_project_ids,
+                employee_weeks=employee_weeks,
+            )
 
         return instance
-
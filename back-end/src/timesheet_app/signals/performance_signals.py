@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from timesheet_app.models import EmployeePerformance, Project, ProjectPerformance, Task, TaskEfficiency
+from timesheet_app.utils.performance_cache import invalidate_employee_performance, invalidate_project_performance
+
+# The calculators write in bulk and invalidate explicitly; these receivers cover
+# rows saved one at a time (admin, shell, fixtures).
+
+
+@receiver(post_init, sender=Project)
+def remember_project_manager(sender, instance, **kwargs):
+    instance._saved_manager_id = instance.__dict__.get("manager_id")
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    # A reassigned project leaves the previous manager's dashboard as well
+    invalidate_project_performance([instance.id], {instance.manager_id, instance._saved_manager_id})
+    instance._saved_manager_id = instance.manager_id
+
+
+@receiver(post_init, sender=Task)
+def remember_task_project(sender, instance, **kwargs):
+    instance._saved_project_id = instance.__dict__.get("project_id")
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    # Project task-efficiency reports include task fields (name, project)
+    invalidate_project_performance({instance.project_id, instance._saved_project_id})
+    instance._saved_project_id = instance.project_id
+
+
+@receiver(post_save, sender=ProjectPerformance)
+@receiver(post_delete, sender=ProjectPerformance)
+def project_performance_changed(sender, instance, **kwargs):
+    manager_ids = Project.objects.filter(id=instance.project_id).values_list("manager_id", flat=True)
+    invalidate_project_performance([instance.project_id], manager_ids)
+
+
+@receiver(post_save, sender=TaskEfficiency)
+@receiver(post_delete, sender=TaskEfficiency)
+def task_efficiency_changed(sender, instance, **kwargs):
+    invalidate_project_performance(Task.objects.filter(id=instance.task_id).values_list("project_id", flat=True))
+
+
+@receiver(post_save, sender=EmployeePerformance)
+@receiver(post_delete, sender=EmployeePerformance)
+def employee_performance_changed(sender, instance, **kwargs):
+    invalidate_employee_performance([instance.user_id])
@@ -1,28 +1,51 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_delete
 from django.dispatch import receiver
-from datetime import timedelta, date
-from timesheet_app.models.timesheet_model import Timesheet
-from timesheet_app.utils.performance_calculator import (
-    calculate_employee_performance,
-    calculate_task_efficiency,
-    calculate_project_performance
-)
-from datetime import date
+from timesheet_app.models.timesheet_model import Timesheet, TaskEntry
+from timesheet_app.utils.performance_queue import enqueue_performance_recompute
+from timesheet_app.utils.employee_snapshot import apply_snapshot_delta, bulk_delete_active, timesheet_hours_summary
+from timesheet_app.utils.task_hours import apply_logged_hours_deltas, entry_hours_by_task, logged_hours_deltas
+
+
+@receiver(post_init, sender=Timesheet)
+def remember_approval_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (.only()) don't fetch the field per row
+    instance._saved_approval_status = instance.__dict__.get("approval_status")
 
 
 @receiver(post_save, sender=Timesheet)
-def update_performance_on_approval(sender, instance, **kwargs):
-    if instance.approval_status == "Approved":
-        user = instance.user
-        week_start = instance.week_start_date
-
-        # Recalculate employee performance
-        calculate_employee_performance(user, week_start)
-
-        # Recalculate task + project metrics
-        for log in instance.daily_logs.all():
-            for task_entry in log.task_entries.select_related("task", "daily_log"):
-                task = task_entry.task
-                project = task.project
-                calculate_task_efficiency(task)
-                calculate_project_performance(project)
+def update_performance_on_approval(sender, instance, created, **kwargs):
+    previous_status = instance._saved_approval_status
+    instance._saved_approval_status = instance.approval_status
+
+    # Only the Pending -> Approved transition changes approved metrics; re-saving
+    # an approved timesheet (e.g. update_hours) must not trigger another pass
+    if created or previous_status != "Pending" or instance.approval_status != "Approved":
+        return
+
+    entries = TaskEntry.objects.filter(daily_log__timesheet=instance).values_list("task_id", "task__project_id").distinct()
+    task_ids = set()
+    project_ids = set()
+    for task_id, project_id in entries:
+        task_ids.add(task_id)
+        project_ids.add(project_id)
+
+    # The dirty keys are written in the approving transaction, so the worker
+    # only sees them once the approval commits and never if it rolls back
+    enqueue_performance_recompute(
+        task_ids=task_ids,
+        project_ids=project_ids,
+        employee_weeks=[(instance.user_id, instance.week_start_date)],
+    )
+
+
+@receiver(pre_delete, sender=Timesheet)
+def remove_timesheet_from_snapshot(sender, instance, **kwargs):
+    if bulk_delete_active():
+        # delete_timesheets() already applied the whole batch's deltas
+        return
+
+    # Runs before the cascade removes the logs, so the contribution can still be read
+    apply_snapshot_delta(instance.user_id, removed=timesheet_hours_summary(instance), timesheets=-1)
+
+    hours = entry_hours_by_task(TaskEntry.objects.filter(daily_log__timesheet=instance))
+    apply_logged_hours_deltas(logged_hours_deltas(removed=hours.items()))
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from timesheet_app.authentication import revoke_refresh_tokens
+from timesheet_app.models import ClaimsUser
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=ClaimsUser)
+def remember_active_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (ClaimsUser) don't fetch the field
+    instance._saved_is_active = instance.__dict__.get("is_active")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def revoke_tokens_on_deactivation(sender, instance, created, **kwargs):
+    was_active = instance._saved_is_active
+    instance._saved_is_active = instance.is_active
+    if not created and was_active is not False and not instance.is_active:
+        revoke_refresh_tokens(instance.id)
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=ClaimsUser)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    # Outstanding tokens lose their user link once the row is gone
+    revoke_refresh_tokens(instance.id)
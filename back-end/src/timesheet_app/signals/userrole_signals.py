@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from timesheet_app.authentication import revoke_refresh_tokens
+from timesheet_app.models import UserRole
+from timesheet_app.utils.org_hierarchy import invalidate_org_hierarchy
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def refresh_org_hierarchy(sender, **kwargs):
+    invalidate_org_hierarchy()
+
+
+@receiver(post_init, sender=UserRole)
+def remember_role(sender, instance, **kwargs):
+    instance._saved_role = instance.__dict__.get("role")
+
+
+@receiver(post_save, sender=UserRole)
+def revoke_tokens_on_role_change(sender, instance, created, **kwargs):
+    # Access tokens carry the role claim; refreshing must not copy the old one forward
+    previous_role = instance._saved_role
+    instance._saved_role = instance.role
+    if not created and previous_role != instance.role:
+        revoke_refresh_tokens(instance.user_id)
+
+
+@receiver(post_delete, sender=UserRole)
+def revoke_tokens_on_role_delete(sender, instance, **kwargs):
+    revoke_refresh_tokens(instance.user_id)
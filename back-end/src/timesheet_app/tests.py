@@ -1,3 +1,1113 @@
+import json
+import re
+from collections import Counter, namedtuple
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from timesheet_app.models import (
+    Project, Task, UserRole, Timesheet, DailyLog, TaskEntry, EmployeeSnapshot,
+    EmployeePerformance, PerformanceDirtyKey, ProjectPerformance, TaskEfficiency,
+)
+from timesheet_app.models.leave_model import LeaveRequest
+from timesheet_app.models.timesheettemplate_model import TimesheetTemplate
+from timesheet_app.serializers.timesheet_serializer import TimesheetSummarySerializer
+from timesheet_app.utils.pagination import DEFAULT_PAGE_SIZE
+from timesheet_app.utils.employee_snapshot import rebuild_employee_snapshots
+from timesheet_app.utils.performance_calculator import (
+    calculate_employee_performances,
+    calculate_project_performances,
+    calculate_task_efficiencies,
+    summarise_employee_hours,
+)
+from timesheet_app.utils.performance_queue import enqueue_performance_recompute, process_performance_batch
+from timesheet_app.utils.org_hierarchy import ORG_HIERARCHY_CACHE_KEY, direct_reports, get_org_hierarchy, manager_of
+from timesheet_app.views.auth_view import get_tokens_for_user
+
+
+class TimesheetTestCase(TestCase):
+    """A manager, one of their employees and a handful of projects and tasks."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user("manager", password="pass")
+        UserRole.objects.create(user=self.manager, role="manager")
+        self.employee = User.objects.create_user("employee", password="pass")
+        UserRole.objects.create(user=self.employee, role="employee", manager=self.manager)
+
+        self.projects = [Project.objects.create(project_name=f"Project {i}", description="") for i in range(3)]
+        self.tasks = [
+            Task.objects.create(project=self.projects[i % 3], name=f"Task {i}", assigned_to=self.employee)
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.next_week = date(2025, 1, 6)
+        # Rolled back rows reuse ids, so start every test from an empty cache
+        cache.clear()
+        # Steady state: the cross-request hierarchy cache is already warm
+        get_org_hierarchy()
+
+    def add_timesheets(self, count, entries_per_day):
+        for _ in range(count):
+            timesheet = Timesheet.objects.create(user=self.employee, week_start_date=self.next_week)
+            for day in range(5):
+                log = DailyLog.objects.create(
+                    timesheet=timesheet,
+                    date=self.next_week + timedelta(days=day),
+                    start_time=time(9, 0),
+                    end_time=time(17, 0),
+                )
+                for i in range(entries_per_day):
+                    TaskEntry.objects.create(daily_log=log, task=self.tasks[i % len(self.tasks)], duration=1.0)
+            self.next_week += timedelta(weeks=1)
+
+
+class TimesheetListQueryCountTests(TimesheetTestCase):
+    """Timesheet list/detail endpoints must not issue queries per log or entry."""
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, user, url):
+        self.add_timesheets(1, 1)
+        small = self.count_queries(user, url)
+        self.add_timesheets(4, 6)
+        large = self.count_queries(user, url)
+        self.assertEqual(small, large, f"{url} went from {small} to {large} queries as rows grew")
+
+    def test_employee_list_is_constant(self):
+        self.assertConstantQueries(self.employee, "/api/timesheet/list")
+
+    def test_manager_list_is_constant(self):
+        self.assertConstantQueries(self.manager, "/api/timesheet/all")
+
+    def test_manager_summary_is_one_values_query(self):
+        self.add_timesheets(3, 6)
+        self.client.force_authenticate(self.manager)
+        for params in ({"view": "summary"}, {"view": "summary", "page_size": 2}):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get("/api/timesheet/all", params)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(len(ctx.captured_queries), 1, [query["sql"] for query in ctx.captured_queries])
+            self.assertIn('FROM "timesheet_app_timesheet"', ctx.captured_queries[0]["sql"])
+
+            rows = response.data["data"]
+            self.assertTrue(rows)
+            for row in rows:
+                self.assertNotIn("daily_logs", row)
+                self.assertEqual(set(row), set(TimesheetSummarySerializer().fields))
+
+    def test_detail_is_constant(self):
+        self.add_timesheets(1, 1)
+        small_id = Timesheet.objects.latest("id").id
+        small = self.count_queries(self.manager, f"/api/timesheet/manager/{small_id}")
+        self.add_timesheets(1, 6)
+        large_id = Timesheet.objects.latest("id").id
+        large = self.count_queries(self.manager, f"/api/timesheet/manager/{large_id}")
+        self.assertEqual(small, large)
+
+
+class ManagerBulkReviewTests(TimesheetTestCase):
+    """Bulk review applies every decision in one statement and refuses foreign timesheets."""
+
+    def review(self, items):
+        self.client.force_authenticate(self.manager)
+        return self.client.post("/api/timesheet/manager/bulk", {"items": items}, format="json")
+
+    def test_bulk_review(self):
+        self.add_timesheets(3, 1)
+        first, second, third = Timesheet.objects.order_by("id").values_list("id", flat=True)
+        Timesheet.objects.filter(id=third).update(approval_status="Approved")
+
+        response = self.review([
+            {"id": first, "action": "approve"},
+            {"id": second, "action": "reject", "rejection_reason": "Missing Friday"},
+            {"id": third, "action": "approve"},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["skipped"], [third])
+        statuses = dict(Timesheet.objects.values_list("id", "approval_status"))
+        self.assertEqual(statuses, {first: "Approved", second: "Rejected", third: "Approved"})
+        self.assertEqual(Timesheet.objects.get(id=second).rejection_reason, "Missing Friday")
+
+    def test_bulk_review_rejects_foreign_ids(self):
+        self.add_timesheets(1, 1)
+        own = Timesheet.objects.get().id
+        other = User.objects.create_user("other", password="pass")
+        foreign = Timesheet.objects.create(user=other, week_start_date=date(2025, 1, 6)).id
+
+        response = self.review([{"id": own, "action": "approve"}, {"id": foreign, "action": "approve"}])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["ids"], [foreign])
+        self.assertFalse(Timesheet.objects.filter(approval_status="Approved").exists())
+
+
+class ManagerTimesheetListTests(TimesheetTestCase):
+    """Cursor pages and filters of the manager's team timesheet list."""
+
+    def get_ids(self, **params):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/timesheet/all", {"view": "summary", **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row["id"] for row in response.data["data"]], response.data["next_cursor"]
+
+    def newest_first(self, timesheets):
+        return [t.id for t in sorted(timesheets, key=lambda t: (t.week_start_date, t.id), reverse=True)]
+
+    def test_without_page_size_returns_the_default_page(self):
+        for week in range(DEFAULT_PAGE_SIZE + 1):
+            Timesheet.objects.create(user=self.employee, week_start_date=self.next_week + timedelta(weeks=week))
+        expected = self.newest_first(Timesheet.objects.all())
+
+        ids, next_cursor = self.get_ids()
+        self.assertEqual(ids, expected[:DEFAULT_PAGE_SIZE])
+        self.assertIsNotNone(next_cursor)
+        ids, next_cursor = self.get_ids(cursor=next_cursor)
+        self.assertEqual(ids, expected[DEFAULT_PAGE_SIZE:])
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_round_trip(self):
+        self.add_timesheets(5, 1)
+        pages = []
+        ids, cursor = self.get_ids(page_size=2)
+        pages.append(ids)
+        while cursor:
+            ids, cursor = self.get_ids(page_size=2, cursor=cursor)
+            pages.append(ids)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.newest_first(Timesheet.objects.all()))
+
+    def test_tie_on_week_across_page_boundary(self):
+        week = date(2025, 3, 3)
+        tied = [Timesheet.objects.create(user=self.employee, week_start_date=week) for _ in range(3)]
+        first, cursor = self.get_ids(page_size=2)
+        second, cursor = self.get_ids(page_size=2, cursor=cursor)
+        self.assertIsNone(cursor)
+        self.assertEqual(first + second, self.newest_first(tied))
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/timesheet/all", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters(self):
+        colleague = User.objects.create_user("colleague", password="pass")
+        UserRole.objects.create(user=colleague, role="employee", manager=self.manager)
+        self.add_timesheets(3, 1)
+        early, middle, late = Timesheet.objects.order_by("week_start_date")
+        Timesheet.objects.filter(id=middle.id).update(approval_status="Approved")
+        other = Timesheet.objects.create(user=colleague, week_start_date=late.week_start_date)
+        log = DailyLog.objects.create(timesheet=other, date=other.week_start_date, start_time=time(9, 0), end_time=time(17, 0))
+        TaskEntry.objects.create(daily_log=log, task=self.tasks[2], duration=1.0)
+
+        self.assertEqual(self.get_ids(status="approved")[0], [middle.id])
+        self.assertEqual(self.get_ids(employee=colleague.id)[0], [other.id])
+        self.assertEqual(self.get_ids(project=self.projects[2].id)[0], [other.id])
+        self.assertEqual(self.get_ids(start_date=str(late.week_start_date))[0], self.newest_first([late, other]))
+        self.assertEqual(self.get_ids(end_date=str(early.week_start_date))[0], [early.id])
+
+    def test_invalid_filters(self):
+        self.client.force_authenticate(self.manager)
+        for params in ({"employee": "abc"}, {"project": "abc"}, {"page_size": "abc"}, {"start_date": "03/03/2025"}, {"end_date": "2025-13-01"}):
+            self.assertEqual(self.client.get("/api/timesheet/all", params).status_code, 400, params)
+
+
+class TaskLoggedHoursTests(TimesheetTestCase):
+    """Task.logged_hours follows task entries as timesheets are submitted, edited and deleted."""
+
+    def payload(self, hours):
+        return {
+            "week_start_date": "2025-01-06",
+            "daily_logs": [
+                {
+                    "date": str(date(2025, 1, 6) + timedelta(days=day)),
+                    "start_time": "09:00",
+                    "end_time": "17:00",
+                    "task_entries": [{"task_id": self.tasks[0].id, "duration": hours}],
+                }
+                for day in range(5)
+            ],
+        }
+
+    def logged_hours(self):
+        self.tasks[0].refresh_from_db()
+        return self.tasks[0].logged_hours
+
+    def test_logged_hours_track_entries(self):
+        self.client.force_authenticate(self.employee)
+        response = self.client.post("/api/timesheet/create", self.payload(2.0), format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertAlmostEqual(self.logged_hours(), 10.0)
+
+        timesheet = Timesheet.objects.get()
+        response = self.client.put(f"/api/timesheet/update/{timesheet.id}", self.payload(3.0), format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertAlmostEqual(self.logged_hours(), 15.0)
+
+        timesheet.delete()
+        self.assertAlmostEqual(self.logged_hours(), 0.0)
+
+
+class TimesheetUpdateDiffTests(TimesheetTestCase):
+    """Editing a timesheet only writes the logs and entries that changed."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.employee)
+        payload = {
+            "week_start_date": "2025-01-06",
+            "daily_logs": [
+                {
+                    "date": str(date(2025, 1, 6) + timedelta(days=day)),
+                    "start_time": "09:00",
+                    "end_time": "17:00",
+                    "task_entries": [{"task_id": self.tasks[0].id, "duration": 2.0}, {"task_id": self.tasks[1].id, "duration": 1.0}],
+                }
+                for day in range(3)
+            ],
+        }
+        response = self.client.post("/api/timesheet/create", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.timesheet = Timesheet.objects.get()
+
+    def current_payload(self):
+        logs = self.timesheet.daily_logs.order_by("date").prefetch_related("task_entries")
+        return {
+            "week_start_date": str(self.timesheet.week_start_date),
+            "daily_logs": [
+                {
+                    "date": str(log.date),
+                    "start_time": log.start_time.strftime("%H:%M"),
+                    "end_time": log.end_time.strftime("%H:%M"),
+                    "task_entries": [
+                        {"id": entry.id, "task_id": entry.task_id, "duration": entry.duration}
+                        for entry in sorted(log.task_entries.all(), key=lambda entry: entry.id)
+                    ],
+                }
+                for log in logs
+            ],
+        }
+
+    def put(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f"/api/timesheet/update/{self.timesheet.id}", payload, format="json")
+        return response, [query["sql"] for query in ctx.captured_queries]
+
+    def logged_hours(self, task):
+        task.refresh_from_db()
+        return task.logged_hours
+
+    def test_create_links_the_touched_projects(self):
+        self.assertEqual(
+            set(self.timesheet.projects.values_list("id", flat=True)),
+            {self.projects[0].id, self.projects[1].id},
+        )
+
+    def test_unchanged_resubmit_writes_nothing(self):
+        response, queries = self.put(self.current_payload())
+        self.assertEqual(response.status_code, 200, response.content)
+        writes = [
+            sql for sql in queries
+            if re.match(r'(INSERT|UPDATE|DELETE)\b.*"timesheet_app_(dailylog|taskentry|task)"', sql)
+        ]
+        self.assertEqual(writes, [])
+        self.assertAlmostEqual(self.logged_hours(self.tasks[0]), 6.0)
+
+    def test_moved_entry_keeps_its_id(self):
+        payload = self.current_payload()
+        moved = payload["daily_logs"][0]["task_entries"].pop(0)
+        payload["daily_logs"][1]["task_entries"].append(moved)
+
+        response, _ = self.put(payload)
+        self.assertEqual(response.status_code, 200, response.content)
+        entry = TaskEntry.objects.get(id=moved["id"])
+        self.assertEqual(entry.daily_log.date, date(2025, 1, 7))
+        self.assertAlmostEqual(self.logged_hours(self.tasks[0]), 6.0)
+
+    def test_removed_entries_subtract_their_hours(self):
+        payload = self.current_payload()
+        for log in payload["daily_logs"]:
+            log["task_entries"] = [entry for entry in log["task_entries"] if entry["task_id"] != self.tasks[1].id]
+        payload["daily_logs"].pop()
+
+        response, _ = self.put(payload)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertAlmostEqual(self.logged_hours(self.tasks[0]), 4.0)
+        self.assertAlmostEqual(self.logged_hours(self.tasks[1]), 0.0)
+        self.assertEqual(TaskEntry.objects.count(), 2)
+        self.assertEqual(DailyLog.objects.count(), 2)
+
+    def test_duplicate_dates_are_rejected(self):
+        payload = self.current_payload()
+        payload["daily_logs"][1]["date"] = payload["daily_logs"][0]["date"]
+
+        response, _ = self.put(payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("one daily log per day", str(response.content))
+        self.assertEqual(TaskEntry.objects.count(), 6)
+
+
+class PerformanceQueueTests(TimesheetTestCase):
+    """Dirty keys are written with the caller's transaction and drained once per distinct entity."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_timesheets(1, 2)
+        self.week = Timesheet.objects.get().week_start_date
+
+    def enqueue(self, copies=1):
+        for _ in range(copies):
+            enqueue_performance_recompute(
+                task_ids=[self.tasks[0].id, self.tasks[0].id],
+                project_ids=[self.projects[0].id],
+                employee_weeks=[(self.employee.id, self.week)],
+            )
+
+    def process(self):
+        with CaptureQueriesContext(connection) as ctx:
+            processed = process_performance_batch()
+        return processed, len(ctx.captured_queries)
+
+    def test_enqueue_coalesces_within_a_call(self):
+        self.enqueue()
+        self.assertEqual(
+            sorted(PerformanceDirtyKey.objects.values_list("kind", "object_id")),
+            sorted([
+                (PerformanceDirtyKey.KIND_EMPLOYEE_WEEK, self.employee.id),
+                (PerformanceDirtyKey.KIND_PROJECT, self.projects[0].id),
+                (PerformanceDirtyKey.KIND_TASK, self.tasks[0].id),
+            ]),
+        )
+
+    def test_duplicates_are_recomputed_once_and_rows_deleted(self):
+        self.enqueue()
+        self.assertEqual(process_performance_batch(), 3)
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+        self.assertTrue(TaskEfficiency.objects.filter(task=self.tasks[0]).exists())
+        self.assertTrue(ProjectPerformance.objects.filter(project=self.projects[0]).exists())
+        self.assertTrue(EmployeePerformance.objects.filter(user=self.employee, week_start_date=self.week).exists())
+
+        # With the rows in place, three copies of every key cost the same queries as one
+        self.enqueue()
+        processed, single = self.process()
+        self.assertEqual(processed, 3)
+        self.enqueue(copies=3)
+        processed, repeated = self.process()
+        self.assertEqual(processed, 9)
+        self.assertEqual(repeated, single)
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+        self.assertEqual(process_performance_batch(), 0)
+
+    def test_eager_mode_drains_on_commit(self):
+        with self.settings(PERFORMANCE_QUEUE_EAGER=True):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self.enqueue()
+            self.assertEqual(PerformanceDirtyKey.objects.count(), 3)
+
+            for callback in callbacks:
+                callback()
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+        self.assertTrue(TaskEfficiency.objects.filter(task=self.tasks[0]).exists())
+
+    def test_without_eager_mode_nothing_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enqueue()
+        self.assertEqual(PerformanceDirtyKey.objects.count(), 3)
+
+    def test_rollback_leaves_rows_queued(self):
+        self.enqueue()
+        with transaction.atomic():
+            self.assertEqual(process_performance_batch(), 3)
+            transaction.set_rollback(True)
+        self.assertEqual(PerformanceDirtyKey.objects.count(), 3)
+        self.assertFalse(TaskEfficiency.objects.exists())
+
+    def test_rolled_back_enqueue_leaves_nothing(self):
+        with transaction.atomic():
+            self.enqueue()
+            transaction.set_rollback(True)
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+
+
+class ApprovalTransitionTests(TimesheetTestCase):
+    """Only the Pending -> Approved transition queues a performance recompute."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_timesheets(1, 2)
+        self.timesheet = Timesheet.objects.get()
+
+    def queued_employee_weeks(self):
+        return PerformanceDirtyKey.objects.filter(kind=PerformanceDirtyKey.KIND_EMPLOYEE_WEEK).count()
+
+    def test_pending_to_approved_enqueues_once(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.put(f"/api/timesheet/manager/{self.timesheet.id}/approve")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(self.queued_employee_weeks(), 1)
+        self.assertEqual(
+            set(PerformanceDirtyKey.objects.filter(kind=PerformanceDirtyKey.KIND_TASK).values_list("object_id", flat=True)),
+            {self.tasks[0].id, self.tasks[1].id},
+        )
+        self.assertEqual(PerformanceDirtyKey.objects.filter(kind=PerformanceDirtyKey.KIND_PROJECT).count(), 2)
+
+    def test_resaving_an_approved_timesheet_enqueues_nothing(self):
+        self.timesheet.approval_status = "Approved"
+        self.timesheet.save()
+        PerformanceDirtyKey.objects.all().delete()
+
+        timesheet = Timesheet.objects.get()
+        timesheet.update_hours()
+        timesheet.save()
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+
+    def test_rejected_to_approved_enqueues_nothing(self):
+        Timesheet.objects.filter(id=self.timesheet.id).update(approval_status="Rejected")
+        timesheet = Timesheet.objects.get()
+        timesheet.approval_status = "Approved"
+        timesheet.save()
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+
+    def test_creating_a_timesheet_enqueues_nothing(self):
+        Timesheet.objects.create(user=self.employee, week_start_date=date(2025, 6, 2))
+        Timesheet.objects.create(user=self.employee, week_start_date=date(2025, 6, 9), approval_status="Approved")
+        self.assertFalse(PerformanceDirtyKey.objects.exists())
+
+
+class PerformanceCalculatorTests(TimesheetTestCase):
+    """Batch calculators against figures worked out by hand, on first write and on recompute."""
+
+    def log(self, week_start_date, day, *entries):
+        timesheet, _ = Timesheet.objects.get_or_create(user=self.employee, week_start_date=week_start_date)
+        log = DailyLog.objects.create(
+            timesheet=timesheet, date=week_start_date + timedelta(days=day), start_time=time(9, 0), end_time=time(17, 0)
+        )
+        return [TaskEntry.objects.create(daily_log=log, task=task, duration=hours) for task, hours in entries]
+
+    def test_project_performance(self):
+        today = date.today()
+        project = self.projects[0]
+        project.budget = 1000.0
+        project.hourly_rate = 50.0
+        project.save()
+        Task.objects.filter(id=self.tasks[0].id).update(status="Completed", completed_on=today, logged_hours=6.0)
+        Task.objects.filter(id=self.tasks[3].id).update(
+            status="In Progress", logged_hours=4.0, updated_at=timezone.now() - timedelta(days=20)
+        )
+
+        calculate_project_performances([project.id])
+        perf = ProjectPerformance.objects.get(project=project)
+        # 10h logged, 1 of 2 tasks done: 50% progress, 500 spent, burn 500 / 50 per point
+        self.assertEqual((perf.total_logged_hours, perf.tasks_completed, perf.tasks_remaining), (10.0, 1, 1))
+        self.assertEqual((perf.average_task_duration, perf.progress_percentage), (10.0, 50.0))
+        self.assertEqual((perf.budget_utilized, perf.budget_remaining, perf.over_budget), (500.0, 500.0, False))
+        self.assertEqual((perf.tasks_per_week, perf.forecasted_budget_burn, perf.budget_deviation), (0.25, 1000.0, 0.0))
+        # The employee also works on the other two projects
+        self.assertEqual((perf.multi_project_load, perf.stalled_tasks_count), (2, 1))
+
+        # Recompute over the existing row
+        Task.objects.filter(id=self.tasks[3].id).update(status="Completed", completed_on=today)
+        calculate_project_performances([project.id, project.id])
+        perf = ProjectPerformance.objects.get(project=project)
+        self.assertEqual((perf.tasks_completed, perf.tasks_remaining, perf.stalled_tasks_count), (2, 0, 0))
+        self.assertEqual((perf.average_task_duration, perf.progress_percentage), (5.0, 100.0))
+        self.assertEqual((perf.tasks_per_week, perf.forecasted_budget_burn, perf.budget_deviation), (0.5, 500.0, -500.0))
+
+    def test_task_efficiency(self):
+        today = timezone.now().date()
+        finished, late = self.tasks[0], self.tasks[1]
+        Task.objects.filter(id=finished.id).update(
+            status="Completed", estimated_hours=8.0, logged_hours=10.0,
+            due_date=today + timedelta(days=1), completed_on=today, created=timezone.now() - timedelta(days=3),
+        )
+        Task.objects.filter(id=late.id).update(status="In Progress", estimated_hours=5.0, due_date=today - timedelta(days=1))
+
+        calculate_task_efficiencies([finished.id, late.id])
+        eff = TaskEfficiency.objects.get(task=finished)
+        self.assertEqual((eff.estimated_hours, eff.actual_hours, eff.efficiency_ratio), (8.0, 10.0, 80.0))
+        self.assertEqual((eff.on_time, eff.overdue, eff.completion_time), (True, False, 3.0))
+        eff = TaskEfficiency.objects.get(task=late)
+        self.assertEqual((eff.efficiency_ratio, eff.on_time, eff.overdue), (0.0, False, True))
+
+        # Recompute over the existing rows: finished late
+        Task.objects.filter(id=late.id).update(status="Completed", logged_hours=10.0, completed_on=today)
+        calculate_task_efficiencies([late.id])
+        eff = TaskEfficiency.objects.get(task=late)
+        self.assertEqual((eff.efficiency_ratio, eff.on_time, eff.overdue), (50.0, False, False))
+        self.assertEqual(TaskEfficiency.objects.count(), 2)
+
+    def test_employee_hours_and_performance(self):
+        Task.objects.filter(id=self.tasks[1].id).update(category="Meeting")
+        previous, week = date(2025, 1, 6), date(2025, 1, 13)
+        self.log(previous, 0, (self.tasks[0], 48.0))
+        self.log(week, 0, (self.tasks[0], 3.0), (self.tasks[1], 2.0))
+        tuesday, = self.log(week, 1, (self.tasks[0], 4.0))
+
+        p0, p1 = self.projects[0].id, self.projects[1].id
+        summaries = summarise_employee_hours(Timesheet.objects.all())
+        self.assertEqual(summaries[(self.employee.id, week)], {
+            "total_hours": 9.0, "productive_hours": 7.0, "admin_hours": 2.0, "task_count": 3,
+            "active_days": {week, week + timedelta(days=1)}, "project_hours": {p0: 7.0, p1: 2.0},
+        })
+        overall = summarise_employee_hours(Timesheet.objects.all(), by_week=False)[self.employee.id]
+        self.assertEqual((overall["total_hours"], overall["productive_hours"], overall["task_count"]), (57.0, 55.0, 4))
+        self.assertEqual((len(overall["active_days"]), overall["project_hours"]), (3, {p0: 55.0, p1: 2.0}))
+
+        calculate_employee_performances([(self.employee.id, week), (self.employee.id, previous)])
+        high = EmployeePerformance.objects.get(user=self.employee, week_start_date=previous)
+        self.assertEqual((high.utilization_rate, high.overutilized, high.high_utilization_weeks), (120.0, True, 0))
+        perf = EmployeePerformance.objects.get(user=self.employee, week_start_date=week)
+        self.assertEqual((perf.total_hours, perf.productive_hours, perf.admin_hours), (9.0, 7.0, 2.0))
+        # 7 productive hours of a 40 hour week, against 120% the week before
+        self.assertEqual((perf.utilization_rate, perf.utilization_trend), (17.5, -102.5))
+        self.assertEqual((perf.underutilized, perf.balanced, perf.high_utilization_weeks), (True, False, 1))
+        self.assertEqual((perf.context_switch_count, perf.average_task_per_day, perf.multi_project_load), (2, 0.6, 2))
+        self.assertEqual(perf.project_time_allocation, {str(p0): 7.0, str(p1): 2.0})
+
+        # Recompute over the existing row
+        TaskEntry.objects.filter(id=tuesday.id).update(duration=44.0)
+        calculate_employee_performances([(self.employee.id, week)])
+        perf = EmployeePerformance.objects.get(user=self.employee, week_start_date=week)
+        self.assertEqual((perf.total_hours, perf.productive_hours, perf.utilization_rate), (49.0, 47.0, 117.5))
+        self.assertEqual((perf.overutilized, perf.utilization_trend, perf.high_utilization_weeks), (True, -2.5, 1))
+        self.assertEqual(EmployeePerformance.objects.count(), 2)
+
+
+class EmployeeSnapshotTests(TimesheetTestCase):
+    """The materialized snapshot and Task.logged_hours stay equal to a full rebuild."""
+
+    def snapshot_values(self):
+        return EmployeeSnapshot.objects.filter(user=self.employee).values(
+            "total_hours", "productive_hours", "admin_hours", "task_count",
+            "timesheet_count", "active_days", "project_time_allocation",
+        ).get()
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot_values()
+        rebuild_employee_snapshots([self.employee.id])
+        self.assertEqual(incremental, self.snapshot_values())
+
+    def test_bulk_delete_matches_rebuild(self):
+        self.add_timesheets(3, 2)
+        rebuild_employee_snapshots([self.employee.id])
+        Task.objects.filter(id__in=[self.tasks[0].id, self.tasks[1].id]).update(logged_hours=15.0)
+
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.delete(f"/api/timesheet/manager_delete_all/{self.employee.id}")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(Timesheet.objects.exists())
+        self.assertEqual(sorted(Task.objects.values_list("logged_hours", flat=True)), [0.0] * 6)
+        self.assertEqual(self.snapshot_values()["timesheet_count"], 0)
+        self.assertMatchesRebuild()
+
+        # Deleting more history costs no extra queries
+        self.add_timesheets(6, 2)
+        rebuild_employee_snapshots([self.employee.id])
+        with CaptureQueriesContext(connection) as large:
+            self.client.delete(f"/api/timesheet/manager_delete_all/{self.employee.id}")
+        self.assertEqual(len(small), len(large))
+
+    def payload(self, week_start, days, task, hours):
+        return {
+            "week_start_date": str(week_start),
+            "daily_logs": [
+                {
+                    "date": str(week_start + timedelta(days=day)),
+                    "start_time": "09:00",
+                    "end_time": "17:00",
+                    "task_entries": [{"task_id": task.id, "duration": hours}],
+                }
+                for day in days
+            ],
+        }
+
+    def test_deltas_match_rebuild(self):
+        rebuild_employee_snapshots([self.employee.id])
+        self.client.force_authenticate(self.employee)
+        first, second = date(2025, 1, 6), date(2025, 1, 13)
+
+        response = self.client.post("/api/timesheet/create", self.payload(first, range(3), self.tasks[0], 2.0), format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertMatchesRebuild()
+
+        response = self.client.post("/api/timesheet/create", self.payload(second, range(5), self.tasks[1], 1.0), format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertMatchesRebuild()
+
+        timesheet = Timesheet.objects.get(week_start_date=first)
+        response = self.client.put(
+            f"/api/timesheet/update/{timesheet.id}", self.payload(first, [1, 4], self.tasks[2], 3.0), format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.snapshot_values()["active_days"], 7)
+
+        timesheet.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(self.snapshot_values()["active_days"], 5)
+
+    def test_log_outside_its_week_is_rejected(self):
+        self.client.force_authenticate(self.employee)
+        payload = self.payload(date(2025, 1, 6), [0, 7], self.tasks[0], 1.0)
+        response = self.client.post("/api/timesheet/create", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("outside the week", str(response.content))
+
+    def test_active_days_are_counted_per_timesheet(self):
+        # Older rows may log the same date under two timesheets; both paths count it twice
+        self.add_timesheets(2, 1)
+        later = Timesheet.objects.order_by("week_start_date").last()
+        DailyLog.objects.filter(timesheet=later).update(date=date(2025, 1, 6))
+        rebuild_employee_snapshots([self.employee.id])
+        # Five days in the first week, plus its Monday again in the second
+        self.assertEqual(self.snapshot_values()["active_days"], 6)
+
+        later.delete()
+        self.assertMatchesRebuild()
+
+
+class OrgHierarchyTests(TimesheetTestCase):
+    """Hierarchy lookups come from the cache and follow UserRole changes."""
+
+    def test_lookups_are_cached(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(manager_of(self.employee.id), self.manager.id)
+            self.assertEqual(direct_reports(self.manager.id), [self.employee.id])
+
+    def test_userrole_save_invalidates(self):
+        other = User.objects.create_user("other", password="pass")
+        UserRole.objects.create(user=other, role="manager")
+        role = self.employee.userrole
+        role.manager = other
+        role.save()
+
+        self.assertEqual(manager_of(self.employee.id), other.id)
+        self.assertEqual(direct_reports(self.manager.id), [])
+
+    def test_userrole_delete_invalidates(self):
+        self.employee.userrole.delete()
+
+        self.assertIsNone(manager_of(self.employee.id))
+        self.assertEqual(direct_reports(self.manager.id), [])
+
+    def test_cache_expires_after_timeout(self):
+        with self.settings(ORG_HIERARCHY_CACHE_TIMEOUT=0):
+            cache.delete(ORG_HIERARCHY_CACHE_KEY)
+            get_org_hierarchy()
+        self.assertIsNone(cache.get(ORG_HIERARCHY_CACHE_KEY))
+
+
+class ClaimsAuthenticationTests(TimesheetTestCase):
+    """Bearer-token requests authorize from the token claims without loading the user."""
+
+    def authenticate_with_token(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + get_tokens_for_user(user)["access"])
+
+    def test_manager_list_skips_user_lookups(self):
+        self.authenticate_with_token(self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/timesheet/all")
+        self.assertEqual(response.status_code, 200, response.content)
+        lookups = [
+            q["sql"] for q in ctx.captured_queries
+            if 'FROM "auth_user"' in q["sql"] or 'FROM "timesheet_app_userrole"' in q["sql"]
+        ]
+        self.assertEqual(lookups, [])
+
+    def test_role_claim_is_enforced(self):
+        self.authenticate_with_token(self.employee)
+        self.assertEqual(self.client.get("/api/timesheet/all").status_code, 403)
+
+    def test_user_fields_hydrate_on_demand(self):
+        self.authenticate_with_token(self.employee)
+        response = self.client.get("/api/auth/loggedinuser")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["username"], "employee")
+        self.assertEqual(response.data["role"], "employee")
+
+    def refresh(self, tokens):
+        return self.client.post("/api/auth/refresh", {"refresh": tokens["refresh"]}, format="json")
+
+    def test_deactivation_ends_access_at_refresh(self):
+        tokens = get_tokens_for_user(self.employee)
+        self.assertEqual(self.refresh(tokens).status_code, 200)
+
+        self.employee.is_active = False
+        self.employee.save()
+
+        # The access token is trusted until it expires, but cannot be renewed
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens["access"])
+        self.assertEqual(self.client.get("/api/timesheet/list").status_code, 200)
+        self.assertEqual(self.refresh(tokens).status_code, 400)
+
+    def test_role_change_revokes_refresh_tokens(self):
+        tokens = get_tokens_for_user(self.employee)
+        role = self.employee.userrole
+        role.role = "manager"
+        role.save()
+        self.assertEqual(self.refresh(tokens).status_code, 400)
+
+        # Saving without a role change leaves fresh tokens alone
+        tokens = get_tokens_for_user(self.employee)
+        role.save()
+        self.assertEqual(self.refresh(tokens).status_code, 200)
+
+    def test_inactive_user_cannot_refresh_without_a_save(self):
+        tokens = get_tokens_for_user(self.employee)
+        # A queryset update skips the signals, so the refresh view checks is_active itself
+        User.objects.filter(id=self.employee.id).update(is_active=False)
+        self.assertEqual(self.refresh(tokens).status_code, 401)
+
+    def test_deleted_user_cannot_refresh(self):
+        tokens = get_tokens_for_user(self.employee)
+        self.employee.delete()
+        self.assertEqual(self.refresh(tokens).status_code, 400)
+
+
+class PerformanceCacheTests(TimesheetTestCase):
+    """Cached performance reads are served without queries until the rows are recomputed."""
+
+    def get(self, url):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data["data"], len(ctx.captured_queries)
+
+    def test_project_performance_is_cached_until_recomputed(self):
+        project = self.projects[0]
+        project.manager = self.manager
+        project.save()
+        calculate_project_performances([project.id])
+        url = f"/api/performance/projects/{project.id}"
+
+        first, _ = self.get(url)
+        cached, queries = self.get(url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached, first)
+
+        Task.objects.filter(project=project).update(logged_hours=4.0)
+        calculate_project_performances([project.id])
+        fresh, queries = self.get(url)
+        self.assertGreater(queries, 0)
+        self.assertEqual(fresh["total_logged_hours"], 8.0)
+
+    def test_task_edit_refreshes_project_task_efficiency(self):
+        project = self.projects[0]
+        project.manager = self.manager
+        project.save()
+        calculate_task_efficiencies([task.id for task in self.tasks])
+        url = f"/api/performance/projects/{project.id}/tasks/efficiency"
+
+        self.get(url)
+        task = self.tasks[0]
+        task.name = "Renamed"
+        task.save()
+        fresh, queries = self.get(url)
+        self.assertGreater(queries, 0)
+        self.assertIn("Renamed", [row["task_name"] for row in fresh])
+
+    def test_reassigned_project_leaves_previous_manager_dashboard(self):
+        project = self.projects[0]
+        project.manager = self.manager
+        project.save()
+        calculate_project_performances([project.id])
+        data, _ = self.get("/api/performance/snapshotsummary")
+        self.assertEqual(data[0]["stat"], "1 projects")
+
+        other = User.objects.create_user("other", password="pass")
+        UserRole.objects.create(user=other, role="manager")
+        project = Project.objects.get(id=project.id)
+        project.manager = other
+        project.save()
+        data, queries = self.get("/api/performance/snapshotsummary")
+        self.assertGreater(queries, 0)
+        self.assertEqual(data[0]["stat"], "0 projects")
+
+    def test_manager_summary_is_one_query_per_model(self):
+        data, queries = self.get("/api/performance/snapshotsummary")
+        self.assertEqual(queries, 2)
+        self.assertEqual([item["id"] for item in data], ["budget", "stalls", "velocity", "utilization"])
+        _, queries = self.get("/api/performance/snapshotsummary")
+        self.assertEqual(queries, 0)
+
+
+class RequestMetricsTests(TimesheetTestCase):
+    """Every response carries Server-Timing and feeds the per-endpoint histogram."""
+
+    def test_server_timing_and_histogram(self):
+        self.add_timesheets(2, 2)
+        self.client.force_authenticate(self.employee)
+        with self.assertLogs("timesheet_app.requests", "INFO") as logs, \
+                CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/timesheet/list")
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing)
+        for span in ("db;", "serialize;", "render;", "total;"):
+            self.assertIn(span, timing)
+
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line["endpoint"], "GET /api/timesheet/list")
+        self.assertEqual(line["queries"], len(ctx.captured_queries))
+        self.assertEqual(line["response_bytes"], len(response.content))
+        self.assertLessEqual(len(line["slowest_queries"]), 3)
+
+        admin = User.objects.create_user("admin", password="pass")
+        UserRole.objects.create(user=admin, role="admin")
+        self.client.force_authenticate(admin)
+        with self.assertLogs("timesheet_app.requests", "INFO"):
+            metrics = self.client.get("/api/metrics/requests").data["data"]
+        self.assertGreaterEqual(metrics["GET /api/timesheet/list"]["count"], 1)
+        self.assertIn("+Inf", metrics["GET /api/timesheet/list"]["histogram"])
+
+        self.client.force_authenticate(self.manager)
+        with self.assertLogs("timesheet_app.requests", "INFO"):
+            self.assertEqual(self.client.get("/api/metrics/requests").status_code, 403)
+
+
+# === Query Budgets ===
+
+# max_growth is how many more queries the large dataset may take than the small one;
+# only writes that deliberately touch rows one at a time declare any
+QueryBudget = namedtuple("QueryBudget", "method actor path payload max_queries max_growth", defaults=[0])
+
+# Every route under api/, called with a small and a large dataset (see QueryBudgetTests.SIZES).
+# The query count must stay within max_queries and not grow with the data.
+ENDPOINT_BUDGETS = {
+    "api/auth/register": QueryBudget("POST", None, "/api/auth/register", lambda t: {"username": "new", "email": "new@example.com", "password": "pass"}, 4),
+    "api/auth/login": QueryBudget("POST", None, "/api/auth/login", lambda t: {"username": "employee", "password": "pass"}, 3),
+    "api/auth/logout": QueryBudget("POST", None, "/api/auth/logout", lambda t: {"refresh_token": t.tokens["employee"]["refresh"]}, 6),
+    "api/auth/loggedinuser": QueryBudget("GET", "employee", "/api/auth/loggedinuser", None, 1),
+    "api/auth/refresh": QueryBudget("POST", None, "/api/auth/refresh", lambda t: {"refresh": t.tokens["employee"]["refresh"]}, 4),
+
+    "api/project/create": QueryBudget("POST", "manager", "/api/project/create", lambda t: {"project_name": "New", "description": "New"}, 1),
+    "api/project/update/<str:pk>": QueryBudget("PUT", "manager", "/api/project/update/{project}", lambda t: {"project_name": "Renamed", "description": "Renamed"}, 3),
+    "api/project/list": QueryBudget("GET", "manager", "/api/project/list", None, 1),
+    "api/project/get_project_detail/<str:pk>": QueryBudget("GET", "manager", "/api/project/get_project_detail/{project}", None, 2),
+
+    # Task hours are locked and shifted by one CASE update, whatever the number of tasks (see apply_logged_hours_deltas)
+    "api/timesheet/create": QueryBudget("POST", "employee", "/api/timesheet/create", lambda t: t.timesheet_payload(t.free_week), 26),
+    "api/timesheet/update/<str:pk>": QueryBudget("PUT", "employee", "/api/timesheet/update/{timesheet}", lambda t: t.timesheet_payload(t.ids["timesheet_week"]), 17),
+    "api/timesheet/list": QueryBudget("GET", "employee", "/api/timesheet/list", None, 3),
+    "api/timesheet/get/<str:pk>": QueryBudget("GET", "employee", "/api/timesheet/get/{timesheet}", None, 3),
+    # Bulk deletes take the whole batch off the snapshot and task hours in one pass (delete_timesheets)
+    "api/timesheet/delete-all": QueryBudget("DELETE", "employee", "/api/timesheet/delete-all", None, 19),
+    "api/timesheet/work-hours": QueryBudget("GET", "employee", "/api/timesheet/work-hours?week_start={timesheet_week}", None, 2),
+    "api/timesheet/all": QueryBudget("GET", "manager", "/api/timesheet/all", None, 3),
+    "api/timesheet/manager/bulk": QueryBudget("POST", "manager", "/api/timesheet/manager/bulk", lambda t: {"items": [{"id": i, "action": "approve"} for i in t.pending_ids]}, 6),
+    "api/timesheet/manager/<str:pk>": QueryBudget("GET", "manager", "/api/timesheet/manager/{timesheet}", None, 3),
+    "api/timesheet/manager/<str:pk>/approve": QueryBudget("PUT", "manager", "/api/timesheet/manager/{timesheet}/approve", None, 4),
+    "api/timesheet/manager/<str:pk>/reject": QueryBudget("PUT", "manager", "/api/timesheet/manager/{timesheet}/reject", lambda t: {"rejection_reason": "Missing hours"}, 2),
+    "api/timesheet/check": QueryBudget("GET", "employee", "/api/timesheet/check?week_start={timesheet_week}", None, 3),
+    "api/timesheet/delete_all": QueryBudget("DELETE", "employee", "/api/timesheet/delete_all", None, 19),
+    "api/timesheet/manager_delete_all/<int:user_id>": QueryBudget("DELETE", "manager", "/api/timesheet/manager_delete_all/{employee}", None, 20),
+    "api/timesheet/manager/<str:pk>/compare": QueryBudget("GET", "manager", "/api/timesheet/manager/{timesheet}/compare", None, 3),
+
+    "api/leave/request": QueryBudget("POST", "employee", "/api/leave/request", lambda t: {"leave_type": "vacation", "start_date": "2030-03-04", "end_date": "2030-03-08"}, 1),
+    "api/leave/track": QueryBudget("GET", "employee", "/api/leave/track", None, 1),
+    "api/leave/manage/<int:leave_id>": QueryBudget("PUT", "manager", "/api/leave/manage/{leave}", lambda t: {"status": "approved"}, 2),
+    "api/leave/manage/all": QueryBudget("GET", "manager", "/api/leave/manage/all", None, 1),
+    "api/leave/get_leave_snapshot": QueryBudget("GET", "employee", "/api/leave/get_leave_snapshot", None, 4),
+    "api/leave/get_manager_leave_snapshot": QueryBudget("GET", "manager", "/api/leave/get_manager_leave_snapshot", None, 3),
+
+    "api/task/create": QueryBudget("POST", "manager", "/api/task/create", lambda t: {"name": "New", "project": t.ids["project"]}, 2),
+    "api/task/update/<str:pk>": QueryBudget("PUT", "manager", "/api/task/update/{task}", lambda t: {"name": "Renamed", "project": t.ids["project"]}, 4),
+    "api/task/list": QueryBudget("GET", "manager", "/api/task/list", None, 1),
+    "api/task/get_task/<str:pk>": QueryBudget("GET", "manager", "/api/task/get_task/{task}", None, 3),
+    "api/task/delete/<str:pk>": QueryBudget("DELETE", "manager", "/api/task/delete/{task}", None, 6),
+    "api/task/assign/<str:pk>": QueryBudget("PUT", "manager", "/api/task/assign/{task}", lambda t: {"assigned_to": t.ids["employee"]}, 4),
+    "api/task/get_assigned_tasks": QueryBudget("GET", "employee", "/api/task/get_assigned_tasks", None, 1),
+
+    "api/performance/projects/<int:project_id>": QueryBudget("GET", "manager", "/api/performance/projects/{project}", None, 2),
+    "api/performance/employees/<int:user_id>/week/<str:week_start>": QueryBudget("GET", "manager", "/api/performance/employees/{employee}/week/{timesheet_week}", None, 1),
+    "api/performance/tasks/<int:task_id>": QueryBudget("GET", "employee", "/api/performance/tasks/{task}", None, 6),
+    "api/performance/projects/<int:project_id>/tasks/efficiency": QueryBudget("GET", "manager", "/api/performance/projects/{project}/tasks/efficiency", None, 3),
+    "api/performance/employees/<int:user_id>/snapshot": QueryBudget("GET", "employee", "/api/performance/employees/{employee}/snapshot", None, 3),
+    "api/performance/employee/task_efficiency": QueryBudget("GET", "employee", "/api/performance/employee/task_efficiency", None, 2),
+    "api/performance/projects/managed": QueryBudget("GET", "manager", "/api/performance/projects/managed", None, 1),
+    "api/performance/projects/<int:project_id>/employees": QueryBudget("GET", "manager", "/api/performance/projects/{project}/employees", None, 3),
+    "api/performance/projects/<int:project_id>/employees/<int:employee_id>/tasks": QueryBudget("GET", "manager", "/api/performance/projects/{project}/employees/{employee}/tasks", None, 3),
+    "api/performance/snapshotsummary": QueryBudget("GET", "manager", "/api/performance/snapshotsummary", None, 2),
+    "api/performance/employees": QueryBudget("GET", "manager", "/api/performance/employees", None, 1),
+    "api/performance/employees/<int:employee_id>/task_efficiency": QueryBudget("GET", "manager", "/api/performance/employees/{employee}/task_efficiency", None, 3),
+    "api/performance/employees/<int:employee_id>/info": QueryBudget("GET", "manager", "/api/performance/employees/{employee}/info", None, 1),
+    "api/performance/cache/stats": QueryBudget("GET", "admin", "/api/performance/cache/stats", None, 0),
+
+    "api/template/create": QueryBudget("POST", "employee", "/api/template/create", lambda t: {"name": "New", "daily_logs": t.timesheet_payload(t.free_week)["daily_logs"]}, 1),
+    "api/template/list": QueryBudget("GET", "employee", "/api/template/list", None, 1),
+    "api/template/load/<int:template_id>": QueryBudget("GET", "employee", "/api/template/load/{template}", None, 1),
+    "api/template/<int:template_id>/delete": QueryBudget("DELETE", "employee", "/api/template/{template}/delete", None, 2),
+
+    "api/metrics/requests": QueryBudget("GET", "admin", "/api/metrics/requests", None, 0),
+}
+
+
+def api_routes():
+    """Full route of every path the timesheet_app url modules define."""
+    routes = []
+    for included in get_resolver().url_patterns:
+        if isinstance(included, URLResolver) and getattr(included.urlconf_module, "__name__", "").startswith("timesheet_app.urls"):
+            routes += [str(included.pattern) + str(pattern.pattern) for pattern in included.url_patterns]
+    return routes
+
+
+def normalize_sql(sql):
+    """Collapse literals and savepoint names so repeats of one statement compare equal."""
+    sql = re.sub(r"'[^']*'|\"s\d+_x\d+\"|\b\d+(\.\d+)?\b", "?", sql)
+    # IN (...) lists and multi-row VALUES differ in length between datasets
+    return re.sub(r"\([?, NUL]*\)(, \([?, NUL]*\))*", "(...)", sql)
+
+
+class QueryBudgetTests(TimesheetTestCase):
+    """Every endpoint stays within its query budget, however much data there is."""
+
+    # (employees, weeks per employee, task entries per day)
+    SIZES = [(1, 1, 1), (3, 3, 3)]
+    FIRST_WEEK = date(2030, 1, 7)
+
+    def seed(self, employees, weeks, entries):
+        """Bulk-create a team with timesheets, leave, templates and recomputed performance rows."""
+        password = self.employee.password
+        users = [self.employee] + User.objects.bulk_create([
+            User(username=f"employee{i}", first_name="Employee", last_name=str(i), password=password)
+            for i in range(1, employees)
+        ])
+        UserRole.objects.bulk_create([UserRole(user=user, role="employee", manager=self.manager) for user in users[1:]])
+
+        projects = Project.objects.bulk_create([
+            Project(project_name=f"Team project {i}", description="", manager=self.manager, budget=100.0)
+            for i in range(employees)
+        ])
+        tasks = Task.objects.bulk_create([
+            Task(project=project, name=f"Team task {i}", assigned_to=user, estimated_hours=10.0)
+            for user, project in zip(users, projects)
+            for i in range(entries)
+        ])
+
+        week_starts = [self.FIRST_WEEK + timedelta(weeks=week) for week in range(weeks)]
+        timesheets = Timesheet.objects.bulk_create([
+            Timesheet(user=user, week_start_date=week_start) for user in users for week_start in week_starts
+        ])
+        logs = DailyLog.objects.bulk_create([
+            DailyLog(timesheet=timesheet, date=timesheet.week_start_date + timedelta(days=day), start_time=time(9, 0), end_time=time(17, 0))
+            for timesheet in timesheets
+            for day in range(5)
+        ])
+        user_tasks = {user.id: [task for task in tasks if task.assigned_to_id == user.id] for user in users}
+        TaskEntry.objects.bulk_create([
+            TaskEntry(daily_log=log, task=task, duration=1.0)
+            for log in logs
+            for task in user_tasks[log.timesheet.user_id]
+        ])
+
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(user=user, leave_type="vacation", start_date=date.today(), end_date=date.today() + timedelta(days=week), status=status)
+            for user in users
+            for week in range(weeks)
+            for status in ("pending", "approved")
+        ])
+        TimesheetTemplate.objects.bulk_create([
+            TimesheetTemplate(user=user, name=f"Template {week}", daily_logs=[]) for user in users for week in range(weeks)
+        ])
+
+        calculate_project_performances([project.id for project in projects])
+        calculate_task_efficiencies([task.id for task in tasks])
+        calculate_employee_performances([(timesheet.user_id, timesheet.week_start_date) for timesheet in timesheets])
+        rebuild_employee_snapshots([user.id for user in users])
+
+        self.free_week = str(week_starts[-1] + timedelta(weeks=1))
+        self.pending_ids = [timesheet.id for timesheet in timesheets]
+        self.ids = {
+            "employee": self.employee.id,
+            "project": projects[0].id,
+            "task": user_tasks[self.employee.id][0].id,
+            "timesheet": timesheets[0].id,
+            "timesheet_week": str(week_starts[0]),
+            "leave": LeaveRequest.objects.filter(user=self.employee, status="pending").values_list("id", flat=True).first(),
+            "template": TimesheetTemplate.objects.filter(user=self.employee).values_list("id", flat=True).first(),
+        }
+
+    def timesheet_payload(self, week_start):
+        task_ids = list(Task.objects.filter(assigned_to=self.employee, project__manager=self.manager).values_list("id", flat=True))
+        week_start = date.fromisoformat(week_start)
+        return {
+            "week_start_date": str(week_start),
+            "daily_logs": [
+                {
+                    "date": str(week_start + timedelta(days=day)),
+                    "start_time": "09:00",
+                    "end_time": "17:00",
+                    "task_entries": [{"task_id": task_id, "duration": 1.0} for task_id in task_ids],
+                }
+                for day in range(5)
+            ],
+        }
+
+    def call(self, budget):
+        """Run one endpoint against the seeded data, rolling back whatever it writes. Returns the SQL it ran."""
+        token = self.tokens[budget.actor]["access"] if budget.actor else None
+        self.client.credentials(**({"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}))
+        payload = budget.payload(self) if budget.payload else None
+        # Steady state for every call: a cold performance cache and a warm org hierarchy
+        cache.clear()
+        get_org_hierarchy()
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                response = getattr(self.client, budget.method.lower())(budget.path.format(**self.ids), payload, format="json")
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, f"{budget.method} {budget.path}: {response.content[:300]!r}")
+        return [query["sql"] for query in ctx.captured_queries]
+
+    def measure_all(self, size):
+        with transaction.atomic():
+            self.seed(*size)
+            queries = {route: self.call(budget) for route, budget in ENDPOINT_BUDGETS.items()}
+            transaction.set_rollback(True)
+        return queries
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user("admin", password="pass")
+        UserRole.objects.create(user=self.admin, role="admin")
+        self.tokens = {
+            "employee": get_tokens_for_user(self.employee),
+            "manager": get_tokens_for_user(self.manager),
+            "admin": get_tokens_for_user(self.admin),
+        }
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(sorted(api_routes()), sorted(ENDPOINT_BUDGETS))
 
+    def test_endpoints_stay_within_budget(self):
+        small, large = (self.measure_all(size) for size in self.SIZES)
 
+        failures = []
+        for route, budget in ENDPOINT_BUDGETS.items():
+            growth = len(large[route]) - len(small[route])
+            if growth <= budget.max_growth and len(large[route]) <= budget.max_queries:
+                continue
+            failures.append(
+                f"{budget.method} /{route}: {len(small[route])} queries with the small dataset, "
+                f"{len(large[route])} with the large one (budget {budget.max_queries})"
+            )
+            # The statements the larger dataset repeated are the N+1 suspects
+            repeated = Counter(map(normalize_sql, large[route])) - Counter(map(normalize_sql, small[route]))
+            failures += [f"    +{count}x {sql[:300]}" for sql, count in repeated.most_common(5)]
+        if failures:
+            self.fail("Query budget regressions:\n" + "\n".join(failures))
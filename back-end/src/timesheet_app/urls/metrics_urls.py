@@ -0,0 +1,6 @@
+from django.urls import path
+from timesheet_app.views.metrics_view import get_request_metrics
+
+urlpatterns = [
+    path("requests", get_request_metrics, name="get_request_metrics"),
+]
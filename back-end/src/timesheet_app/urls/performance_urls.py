@@ -12,7 +12,8 @@ from timesheet_app.views.performance_view import (
     get_performance_snapshot_summary,
     get_managed_employees,
     get_employee_task_efficiency, 
-    get_employee_info
+    get_employee_info,
+    get_performance_cache_stats
 )
 
 urlpatterns = [
@@ -29,6 +30,7 @@ urlpatterns = [
     path("employees", get_managed_employees, name="get_managed_employees"),
     path("employees/<int:employee_id>/task_efficiency", get_employee_task_efficiency, name = "get_employee_task_efficiency"),
     path("employees/<int:employee_id>/info", get_employee_info, name="get_employee_info"),
+    path("cache/stats", get_performance_cache_stats, name="get_performance_cache_stats"),
   #
 
 ]
@@ -0,0 +1,46 @@
+from functools import lru_cache
+
+import holidays
+import numpy as np
+
+# Monday to Friday
+WORKING_WEEKMASK = "1111100"
+
+
+@lru_cache(maxsize=None)
+def uk_holidays(year):
+    """UK public holidays for one year, built once per process."""
+    return frozenset(holidays.UnitedKingdom(years=year).keys())
+
+
+def is_uk_holiday(day):
+    return day in uk_holidays(day.year)
+
+
+def is_working_day(day):
+    return day.weekday() < 5 and not is_uk_holiday(day)
+
+
+@lru_cache(maxsize=None)
+def _working_day_calendar(first_year, last_year):
+    days = sorted(day for year in range(first_year, last_year + 1) for day in uk_holidays(year))
+    return np.busdaycalendar(weekmask=WORKING_WEEKMASK, holidays=np.array(days, dtype="datetime64[D]"))
+
+
+def count_working_days(start_dates, end_dates):
+    """
+    Working days (weekdays that are not UK holidays) in each inclusive
+    [start, end] range, computed for all ranges in a single numpy pass.
+    Ranges that end before they start count as zero.
+    """
+    if not len(start_dates):
+        return np.zeros(0, dtype=np.int64)
+
+    calendar = _working_day_calendar(min(start_dates).year, max(end_dates).year)
+    starts = np.array(start_dates, dtype="datetime64[D]")
+    ends = np.array(end_dates, dtype="datetime64[D]") + np.timedelta64(1, "D")
+    return np.maximum(np.busday_count(starts, ends, busdaycal=calendar), 0)
+
+
+def working_days_between(start_date, end_date):
+    return int(count_working_days([start_date], [end_date])[0])
@@ -0,0 +1,177 @@
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+
+from timesheet_app.models import Timesheet, TaskEntry, EmployeeSnapshot
+from timesheet_app.utils.performance_calculator import summarise_employee_hours, empty_hours_summary
+from timesheet_app.utils.performance_cache import KIND_EMPLOYEE, bump_cache_versions
+from timesheet_app.utils.task_hours import apply_logged_hours_deltas, entry_hours_by_task, logged_hours_deltas
+
+SNAPSHOT_BATCH_SIZE = 500
+
+# Set while delete_timesheets() runs so the per-instance pre_delete hook stands aside
+_bulk_delete_active = ContextVar("timesheet_bulk_delete", default=False)
+
+SNAPSHOT_FIELDS = [
+    "total_hours",
+    "productive_hours",
+    "admin_hours",
+    "task_count",
+    "timesheet_count",
+    "active_days",
+    "project_time_allocation",
+]
+
+
+def timesheet_hours_summary(timesheet):
+    """Hours a single timesheet contributes to its owner's snapshot."""
+    summaries = summarise_employee_hours(Timesheet.objects.filter(pk=timesheet.pk), by_week=False)
+    return summaries.get(timesheet.user_id) or empty_hours_summary()
+
+
+def _summaries_by_user(weekly_summaries):
+    """
+    Fold (user_id, week) summaries into one per user. Active days are added up
+    week by week, the same way apply_snapshot_delta counts them per timesheet.
+    """
+    summaries = {}
+    for (user_id, week_start_date), week in weekly_summaries.items():
+        summary = summaries.setdefault(user_id, empty_hours_summary())
+        summary["total_hours"] += week["total_hours"]
+        summary["productive_hours"] += week["productive_hours"]
+        summary["admin_hours"] += week["admin_hours"]
+        summary["task_count"] += week["task_count"]
+        summary["active_days"] |= {(week_start_date, day) for day in week["active_days"]}
+        for project_id, hours in week["project_hours"].items():
+            summary["project_hours"][project_id] = summary["project_hours"].get(project_id, 0.0) + hours
+    return summaries
+
+
+def apply_snapshot_delta(user_id, added=None, removed=None, timesheets=0):
+    """
+    Add one timesheet summary and/or subtract another from a user's materialized
+    snapshot. Users without a snapshot row are skipped; their row is built from
+    scratch on first read, which already includes this change.
+    """
+    with transaction.atomic():
+        snapshot = EmployeeSnapshot.objects.select_for_update().filter(user_id=user_id).first()
+        if snapshot is None:
+            return
+
+        allocation = dict(snapshot.project_time_allocation)
+        for summary, sign in ((added, 1), (removed, -1)):
+            if not summary:
+                continue
+            snapshot.total_hours += sign * summary["total_hours"]
+            snapshot.productive_hours += sign * summary["productive_hours"]
+            snapshot.admin_hours += sign * summary["admin_hours"]
+            snapshot.task_count += sign * summary["task_count"]
+            snapshot.active_days += sign * len(summary["active_days"])
+            for project_id, hours in summary["project_hours"].items():
+                key = str(project_id)
+                allocation[key] = allocation.get(key, 0.0) + sign * hours
+                # Drop projects whose hours were fully removed (allowing for float residue)
+                if abs(allocation[key]) < 1e-9:
+                    del allocation[key]
+
+        snapshot.timesheet_count += timesheets
+        snapshot.project_time_allocation = allocation
+        snapshot.save()
+        bump_cache_versions(KIND_EMPLOYEE, [user_id])
+
+
+def bulk_delete_active():
+    return _bulk_delete_active.get()
+
+
+def delete_timesheets(timesheets):
+    """
+    Delete a Timesheet queryset, subtracting its hours from the owners' snapshots
+    and from Task.logged_hours with one grouped summary per table instead of a
+    pre_delete pass per timesheet.
+    """
+    with transaction.atomic():
+        summaries = _summaries_by_user(summarise_employee_hours(timesheets))
+        timesheet_counts = dict(
+            timesheets.order_by().values("user_id").annotate(count=Count("id")).values_list("user_id", "count")
+        )
+        for user_id, count in sorted(timesheet_counts.items()):
+            apply_snapshot_delta(user_id, removed=summaries.get(user_id), timesheets=-count)
+
+        hours = entry_hours_by_task(TaskEntry.objects.filter(daily_log__timesheet__in=timesheets))
+        apply_logged_hours_deltas(logged_hours_deltas(removed=hours.items()))
+
+        token = _bulk_delete_active.set(True)
+        try:
+            timesheets.delete()
+        finally:
+            _bulk_delete_active.reset(token)
+
+
+def rebuild_employee_snapshots(user_ids=None, batch_size=SNAPSHOT_BATCH_SIZE):
+    """Recompute snapshots from every timesheet ever submitted. Returns the number of rows written."""
+    if user_ids is None:
+        user_ids = User.objects.order_by("id").values_list("id", flat=True)
+    user_ids = list(user_ids)
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        timesheets = Timesheet.objects.filter(user_id__in=batch)
+        summaries = _summaries_by_user(summarise_employee_hours(timesheets))
+        timesheet_counts = dict(
+            timesheets.order_by().values("user_id").annotate(count=Count("id")).values_list("user_id", "count")
+        )
+
+        snapshots = []
+        for user_id in batch:
+            summary = summaries.get(user_id) or empty_hours_summary()
+            snapshots.append(EmployeeSnapshot(
+                user_id=user_id,
+                total_hours=summary["total_hours"],
+                productive_hours=summary["productive_hours"],
+                admin_hours=summary["admin_hours"],
+                task_count=summary["task_count"],
+                timesheet_count=timesheet_counts.get(user_id, 0),
+                active_days=len(summary["active_days"]),
+                project_time_allocation={str(k): v for k, v in summary["project_hours"].items()},
+            ))
+
+        EmployeeSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=SNAPSHOT_FIELDS + ["last_updated"],
+        )
+        bump_cache_versions(KIND_EMPLOYEE, batch)
+
+    return len(user_ids)
+
+
+def load_employee_snapshot(user):
+    """All-time performance summary for `user`, read from the materialized row."""
+    snapshot = EmployeeSnapshot.objects.filter(user=user).first()
+    if snapshot is None:
+        rebuild_employee_snapshots([user.id])
+        snapshot = EmployeeSnapshot.objects.get(user=user)
+
+    productive = snapshot.productive_hours
+    total = snapshot.total_hours
+    utilization = round((productive / total) * 100, 2) if total else 0.0
+    overutilized = productive > 45
+    underutilized = productive < 30
+
+    return {
+        "total_hours": total,
+        "productive_hours": productive,
+        "admin_hours": snapshot.admin_hours,
+        "utilization_rate": utilization,
+        "average_task_per_day": round(snapshot.task_count / snapshot.timesheet_count, 2) if snapshot.timesheet_count else 0.0,
+        "context_switch_count": snapshot.active_days,
+        "multi_project_load": len(snapshot.project_time_allocation),
+        "overutilized": overutilized,
+        "underutilized": underutilized,
+        "balanced": not overutilized and not underutilized,
+        "project_time_allocation": snapshot.project_time_allocation,
+    }
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from timesheet_app.models import UserRole
+
+ORG_HIERARCHY_CACHE_KEY = "timesheet_app:org_hierarchy"
+
+
+def load_org_hierarchy():
+    """Role, manager and direct reports of every user, from one query over UserRole."""
+    roles = {}
+    managers = {}
+    reports = {}
+    for user_id, role, manager_id in UserRole.objects.values_list("user_id", "role", "manager_id"):
+        roles[user_id] = role
+        managers[user_id] = manager_id
+        if manager_id is not None:
+            reports.setdefault(manager_id, []).append(user_id)
+    return {"roles": roles, "managers": managers, "reports": reports}
+
+
+def get_org_hierarchy(request=None):
+    """
+    The org hierarchy, memoized on `request` for the rest of the request and in
+    the Django cache across requests until the next UserRole change (or
+    ORG_HIERARCHY_CACHE_TIMEOUT, which bounds staleness in other processes when
+    the cache is not shared).
+    """
+    hierarchy = getattr(request, "_org_hierarchy", None)
+    if hierarchy is not None:
+        return hierarchy
+
+    hierarchy = cache.get(ORG_HIERARCHY_CACHE_KEY)
+    if hierarchy is None:
+        hierarchy = load_org_hierarchy()
+        cache.set(ORG_HIERARCHY_CACHE_KEY, hierarchy, settings.ORG_HIERARCHY_CACHE_TIMEOUT)
+
+    if request is not None:
+        request._org_hierarchy = hierarchy
+    return hierarchy
+
+
+def invalidate_org_hierarchy():
+    cache.delete(ORG_HIERARCHY_CACHE_KEY)
+    # A request rebuilding the cache before this transaction commits would store the old rows again
+    transaction.on_commit(lambda: cache.delete(ORG_HIERARCHY_CACHE_KEY))
+
+
+def role_of(user_id, request=None):
+    """The user's role, or None when they have no UserRole."""
+    return get_org_hierarchy(request)["roles"].get(user_id)
+
+
+def manager_of(user_id, request=None):
+    """The id of the user's manager, or None."""
+    return get_org_hierarchy(request)["managers"].get(user_id)
+
+
+def direct_reports(manager_id, request=None):
+    """Ids of the users who report directly to `manager_id`."""
+    return list(get_org_hierarchy(request)["reports"].get(manager_id, ()))
+
+
+def is_manager_of(manager_id, user_id, request=None):
+    return manager_id is not None and manager_of(user_id, request) == manager_id
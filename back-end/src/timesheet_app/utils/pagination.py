@@ -0,0 +1,59 @@
+import base64
+import binascii
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(week_start_date, pk):
+    raw = f"{week_start_date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        week, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(week), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def parse_page_size(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError("page_size must be positive.")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def paginate_timesheets(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Keyset pagination over (week_start_date, id), newest first. Each page is a
+    range scan from the cursor position, so later pages cost the same as the first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by("-week_start_date", "-id")
+    if cursor:
+        week_start_date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(week_start_date__lt=week_start_date) | Q(week_start_date=week_start_date, id__lt=pk)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    # Rows are dicts when the queryset was narrowed with values()
+    if isinstance(last, dict):
+        return rows, encode_cursor(last["week_start_date"], last["id"])
+    return rows, encode_cursor(last.week_start_date, last.id)
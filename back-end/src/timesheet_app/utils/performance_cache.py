@@ -0,0 +1,108 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from timesheet_app.utils.org_hierarchy import manager_of
+
+KIND_PROJECT = "project"
+KIND_EMPLOYEE = "employee"
+KIND_MANAGER = "manager"
+
+CACHE_PREFIX = "timesheet_app:performance"
+
+
+def _version_key(kind, object_id):
+    return f"{CACHE_PREFIX}:version:{kind}:{object_id}"
+
+
+def cache_versions(scopes):
+    """
+    Current version token of each (kind, object_id) scope. A scope whose token
+    was never set (or was evicted) gets a fresh one, so entries cached under an
+    older token can never be served again.
+    """
+    keys = [_version_key(kind, object_id) for kind, object_id in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_cache_versions(kind, object_ids):
+    """Invalidate every entry cached under these scopes by giving them new version tokens."""
+    object_ids = {object_id for object_id in object_ids if object_id is not None}
+    if not object_ids:
+        return
+
+    def bump():
+        cache.set_many({_version_key(kind, object_id): uuid.uuid4().hex for object_id in object_ids}, None)
+
+    bump()
+    # A read between now and commit would cache the old rows under the new token
+    transaction.on_commit(bump)
+
+
+def invalidate_project_performance(project_ids, manager_ids=()):
+    """Project rows (or their task efficiencies) changed, along with their managers' dashboards."""
+    bump_cache_versions(KIND_PROJECT, project_ids)
+    bump_cache_versions(KIND_MANAGER, manager_ids)
+
+
+def invalidate_employee_performance(user_ids):
+    """Employee rows changed, along with the dashboard of each employee's manager."""
+    user_ids = set(user_ids)
+    bump_cache_versions(KIND_EMPLOYEE, user_ids)
+    bump_cache_versions(KIND_MANAGER, {manager_of(user_id) for user_id in user_ids})
+
+
+def _count(endpoint, outcome):
+    key = f"{CACHE_PREFIX}:stats:{endpoint}:{outcome}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); the counter restarts
+        cache.set(key, 1, None)
+
+
+def cached_payload(endpoint, key_parts, scopes, build):
+    """
+    Return the payload `build()` produces for this endpoint and key, serving it
+    from the cache while none of `scopes` has been invalidated.
+    """
+    versions = cache_versions(scopes)
+    key = ":".join([CACHE_PREFIX, endpoint, *map(str, key_parts), *versions])
+
+    payload = cache.get(key)
+    if payload is not None:
+        _count(endpoint, "hits")
+        return payload
+
+    _count(endpoint, "misses")
+    payload = build()
+    cache.set(key, payload, settings.PERFORMANCE_CACHE_TIMEOUT)
+    return payload
+
+
+def cache_stats(endpoints):
+    """Hit and miss counters, and the resulting hit rate, for each endpoint."""
+    keys = {
+        (endpoint, outcome): f"{CACHE_PREFIX}:stats:{endpoint}:{outcome}"
+        for endpoint in endpoints
+        for outcome in ("hits", "misses")
+    }
+    counts = cache.get_many(keys.values())
+    stats = {}
+    for endpoint in endpoints:
+        hits = counts.get(keys[(endpoint, "hits")], 0)
+        misses = counts.get(keys[(endpoint, "misses")], 0)
+        stats[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+    return stats
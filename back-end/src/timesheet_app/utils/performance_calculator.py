@@ -1,211 +1,380 @@
+from collections import defaultdict
 from datetime import timedelta, date
+from django.db import transaction
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 
 
-from timesheet_app.models import Timesheet
+from timesheet_app.models import Timesheet, TaskEntry
 from timesheet_app.models import Project, Task
 from timesheet_app.models  import ProjectPerformance, TaskEfficiency, EmployeePerformance
+from timesheet_app.utils.performance_cache import invalidate_employee_performance, invalidate_project_performance
+
+PROJECT_BATCH_SIZE = 500
+
+PROJECT_PERFORMANCE_FIELDS = [
+    "total_logged_hours",
+    "average_task_duration",
+    "tasks_completed",
+    "tasks_remaining",
+    "progress_percentage",
+    "project_budget",
+    "budget_utilized",
+    "budget_remaining",
+    "over_budget",
+    "tasks_per_week",
+    "forecasted_budget_burn",
+    "budget_deviation",
+    "multi_project_load",
+    "stalled_tasks_count",
+    "last_updated",
+]
+
 
 def calculate_project_performance(project: Project):
-    tasks = project.tasks.all()
-    logged_hours = tasks.aggregate(total=Sum("logged_hours"))["total"] or 0.0
-    completed = tasks.filter(status="Completed").count()
-    remaining = tasks.exclude(status="Completed").count()
-    total_tasks = completed + remaining
-
-    # === Basic Metrics ===
-    avg_task_duration = logged_hours / completed if completed else 0.0
-    progress_pct = (completed / total_tasks) * 100 if total_tasks else 0.0
-    budget_used = logged_hours * project.hourly_rate
-    budget_remaining = max(project.budget - budget_used, 0.0)
-
-    # === Timeline-Based Checks ===
-    today = date.today()
-    project_days_total = (project.end_date - project.start_date).days if project.start_date and project.end_date else 0
-    project_days_elapsed = (today - project.start_date).days if project.start_date else 0
-    progress_expected = (project_days_elapsed / project_days_total) * 100 if project_days_total else 0.0
-    on_track = progress_pct >= progress_expected if project_days_total else None
+    calculate_project_performances([project.id])
+
+
+def calculate_project_performances(project_ids, batch_size=PROJECT_BATCH_SIZE):
+    """
+    Recompute ProjectPerformance for many projects at once. Each batch costs a
+    fixed number of queries (one conditional aggregate over tasks, one for
+    assignee overlap, one load of projects and of existing rows, then bulk writes).
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    for start in range(0, len(project_ids), batch_size):
+        _calculate_project_performance_batch(project_ids[start:start + batch_size])
 
-    # === Velocity Metrics ===
+
+def _calculate_project_performance_batch(project_ids):
+    today = date.today()
     recent_weeks = 4
-    recent_tasks = tasks.filter(status="Completed", completed_on__gte=today - timedelta(weeks=recent_weeks))
-    tasks_per_week = recent_tasks.count() / recent_weeks if recent_tasks.exists() else 0.0
-
-    # === Forecasting ===
-    weeks_left = (project.end_date - today).days / 7 if project.end_date else 0
-    # Default burn rate is hourly_rate * 40 if insufficient progress (less than 5%)
-    burn_rate = (budget_used / progress_pct) if progress_pct > 5 else (project.hourly_rate * 40)
-    forecasted_burn = burn_rate * 100 if progress_pct > 5 else burn_rate * weeks_left
-    budget_deviation = forecasted_burn - project.budget if progress_pct > 0 else 0.0
-    expected_burn = project.budget * (project_days_elapsed / project_days_total) if project_days_total else 0.0
-
-    # === Risk & Load Metrics ===
-    stalled_tasks = tasks.filter(updated_at__lte=today - timedelta(days=14), status__in=["Not Started", "In Progress"]).count()
-    user_ids = tasks.values_list("assigned_to", flat=True).distinct()
-    multi_project_load = (
-        Task.objects.filter(assigned_to__in=user_ids)
-        .exclude(project=project)
-        .values("project")
+
+    # === Task Figures (one conditional aggregate for the whole batch) ===
+    task_stats = {
+        row["project_id"]: row
+        for row in Task.objects.filter(project_id__in=project_ids)
+        .order_by()
+        .values("project_id")
+        .annotate(
+            logged_hours=Sum("logged_hours"),
+            completed=Count("id", filter=Q(status="Completed")),
+            remaining=Count("id", filter=~Q(status="Completed")),
+            recent_completed=Count(
+                "id",
+                filter=Q(status="Completed", completed_on__gte=today - timedelta(weeks=recent_weeks)),
+            ),
+            stalled=Count(
+                "id",
+                filter=Q(updated_at__lte=today - timedelta(days=14), status__in=["Not Started", "In Progress"]),
+            ),
+        )
+    }
+
+    # === Assignee Overlap (every project touched by anyone working on the batch) ===
+    batch_assignees = Task.objects.filter(project_id__in=project_ids, assigned_to__isnull=False).values("assigned_to")
+    projects_by_user = defaultdict(set)
+    users_by_project = defaultdict(set)
+    for user_id, project_id in (
+        Task.objects.filter(assigned_to__in=batch_assignees)
+        .order_by()
+        .values_list("assigned_to_id", "project_id")
         .distinct()
-        .count()
+    ):
+        projects_by_user[user_id].add(project_id)
+        users_by_project[project_id].add(user_id)
+
+    existing = {perf.project_id: perf for perf in ProjectPerformance.objects.filter(project_id__in=project_ids)}
+    to_create = []
+    to_update = []
+    manager_ids = set()
+    now = timezone.now()
+
+    for project in Project.objects.filter(id__in=project_ids):
+        manager_ids.add(project.manager_id)
+        stats = task_stats.get(project.id, {})
+        logged_hours = stats.get("logged_hours") or 0.0
+        completed = stats.get("completed", 0)
+        remaining = stats.get("remaining", 0)
+        total_tasks = completed + remaining
+
+        # === Basic Metrics ===
+        avg_task_duration = logged_hours / completed if completed else 0.0
+        progress_pct = (completed / total_tasks) * 100 if total_tasks else 0.0
+        budget_used = logged_hours * project.hourly_rate
+        budget_remaining = max(project.budget - budget_used, 0.0)
+
+        # === Velocity Metrics ===
+        tasks_per_week = stats.get("recent_completed", 0) / recent_weeks
+
+        # === Forecasting ===
+        weeks_left = (project.end_date - today).days / 7 if project.end_date else 0
+        # Default burn rate is hourly_rate * 40 if insufficient progress (less than 5%)
+        burn_rate = (budget_used / progress_pct) if progress_pct > 5 else (project.hourly_rate * 40)
+        forecasted_burn = burn_rate * 100 if progress_pct > 5 else burn_rate * weeks_left
+        budget_deviation = forecasted_burn - project.budget if progress_pct > 0 else 0.0
+
+        # === Risk & Load Metrics ===
+        other_projects = set()
+        for user_id in users_by_project.get(project.id, ()):
+            other_projects |= projects_by_user[user_id]
+        other_projects.discard(project.id)
+
+        # === Save Performance Stats ===
+        perf = existing.get(project.id)
+        if perf is None:
+            perf = ProjectPerformance(project=project)
+            to_create.append(perf)
+        else:
+            to_update.append(perf)
+
+        perf.total_logged_hours = logged_hours
+        perf.average_task_duration = avg_task_duration
+        perf.tasks_completed = completed
+        perf.tasks_remaining = remaining
+        perf.progress_percentage = progress_pct
+        perf.project_budget = project.budget
+        perf.budget_utilized = budget_used
+        perf.budget_remaining = budget_remaining
+        perf.over_budget = budget_remaining <= 0
+        perf.tasks_per_week = tasks_per_week
+        perf.forecasted_budget_burn = forecasted_burn
+        perf.budget_deviation = budget_deviation
+        perf.multi_project_load = len(other_projects)
+        perf.stalled_tasks_count = stats.get("stalled", 0)
+        perf.last_updated = now
+
+    with transaction.atomic():
+        ProjectPerformance.objects.bulk_create(to_create)
+        ProjectPerformance.objects.bulk_update(to_update, PROJECT_PERFORMANCE_FIELDS)
+        invalidate_project_performance(project_ids, manager_ids)
+
+
+TASK_BATCH_SIZE = 500
+
+TASK_EFFICIENCY_FIELDS = [
+    "estimated_hours",
+    "actual_hours",
+    "efficiency_ratio",
+    "completion_time",
+    "overdue",
+    "on_time",
+]
+
+
+def calculate_task_efficiency(task: Task):
+    calculate_task_efficiencies([task.id])
+
+
+def calculate_task_efficiencies(task_ids, batch_size=TASK_BATCH_SIZE):
+    """
+    Recompute TaskEfficiency for many tasks at once. Each batch reads the tasks
+    and their existing rows in two queries and writes them back with one upsert.
+    Duplicate ids are computed once.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    for start in range(0, len(task_ids), batch_size):
+        _calculate_task_efficiency_batch(task_ids[start:start + batch_size])
+
+
+def _calculate_task_efficiency_batch(task_ids):
+    today = timezone.now().date()
+    existing = {eff.task_id: eff for eff in TaskEfficiency.objects.filter(task_id__in=task_ids)}
+    efficiencies = []
+    project_ids = set()
+
+    for task in Task.objects.filter(id__in=task_ids).only(
+        "id", "project_id", "status", "estimated_hours", "logged_hours", "due_date", "completed_on", "created"
+    ):
+        # Fields that do not apply to the task keep their previous value
+        eff = existing.get(task.id) or TaskEfficiency(task_id=task.id)
+
+        eff.estimated_hours = task.estimated_hours
+        eff.actual_hours = task.logged_hours
+        eff.efficiency_ratio = round((task.estimated_hours / task.logged_hours) * 100, 2) if task.logged_hours > 0 else 0.0
+
+        # Overdue / On-Time
+        if task.due_date:
+            eff.overdue = task.status != "Completed" and today > task.due_date
+            eff.on_time = task.status == "Completed" and today <= task.due_date
+
+        # Completion time
+        if task.status == "Completed" and task.completed_on and task.created:
+            eff.completion_time = (task.completed_on - task.created.date()).days
+
+        efficiencies.append(eff)
+        project_ids.add(task.project_id)
+
+    TaskEfficiency.objects.bulk_create(
+        efficiencies,
+        update_conflicts=True,
+        unique_fields=["task"],
+        update_fields=TASK_EFFICIENCY_FIELDS,
     )
+    invalidate_project_performance(project_ids)
 
-    # === Save Performance Stats ===
-    perf, _ = ProjectPerformance.objects.get_or_create(project=project)
-    perf.total_logged_hours = logged_hours
-    perf.average_task_duration = avg_task_duration
-    perf.tasks_completed = completed
-    perf.tasks_remaining = remaining
-    perf.progress_percentage = progress_pct
-    perf.on_track = on_track
-    perf.budget_warning = budget_used > expected_burn
-    perf.project_budget = project.budget
-    perf.budget_utilized = budget_used
-    perf.budget_remaining = budget_remaining
-    perf.over_budget = budget_remaining <= 0
-    perf.tasks_per_week = tasks_per_week
-    perf.forecasted_budget_burn = forecasted_burn
-    perf.budget_deviation = budget_deviation
-    perf.multi_project_load = multi_project_load
-    perf.stalled_tasks_count = stalled_tasks
-    perf.save()
 
+ADMIN_CATEGORIES = ["Admin", "Training", "Meeting", "Research"]
 
-def calculate_task_efficiency(task: Task):
-    eff, _ = TaskEfficiency.objects.get_or_create(task=task)
+EMPLOYEE_BATCH_SIZE = 200
 
-    eff.estimated_hours = task.estimated_hours
-    eff.actual_hours = task.logged_hours
-    eff.efficiency_ratio = round((task.estimated_hours / task.logged_hours) * 100, 2) if task.logged_hours > 0 else 0.0
+EMPLOYEE_PERFORMANCE_FIELDS = [
+    "total_hours",
+    "productive_hours",
+    "admin_hours",
+    "utilization_rate",
+    "overutilized",
+    "underutilized",
+    "balanced",
+    "context_switch_count",
+    "average_task_per_day",
+    "project_time_allocation",
+    "multi_project_load",
+    "high_utilization_weeks",
+    "utilization_trend",
+    "last_updated",
+]
 
 
-    # Overdue / On-Time
-    if task.due_date:
-        today = timezone.now().date()
-        eff.overdue = task.status != "Completed" and today > task.due_date
-        eff.on_time = task.status == "Completed" and today <= task.due_date
+def empty_hours_summary():
+    return {
+        "total_hours": 0.0,
+        "productive_hours": 0.0,
+        "admin_hours": 0.0,
+        "task_count": 0,
+        "active_days": set(),
+        "project_hours": {},
+    }
 
-    # Completion time
-    if task.status == "Completed" and task.completed_on and task.created:
-        eff.completion_time = (task.completed_on - task.created.date()).days
 
-    eff.save()
+def summarise_employee_hours(timesheets, by_week=True):
+    """
+    Total/productive/admin hours, entry count, active days and per-project hours
+    for every TaskEntry under `timesheets`, from a single GROUP BY query.
+    Keyed by (user_id, week_start_date) when `by_week`, otherwise by user_id.
+    """
+    key_fields = ["daily_log__timesheet__user_id"]
+    if by_week:
+        key_fields.append("daily_log__timesheet__week_start_date")
+
+    rows = (
+        TaskEntry.objects.filter(daily_log__timesheet__in=timesheets)
+        .order_by()
+        .values(*key_fields, "daily_log__date", "task__project_id")
+        .annotate(
+            hours=Sum("duration"),
+            admin_hours=Sum("duration", filter=Q(task__category__in=ADMIN_CATEGORIES)),
+            entry_count=Count("id"),
+        )
+    )
+
+    summaries = {}
+    for row in rows:
+        key = tuple(row[field] for field in key_fields) if by_week else row[key_fields[0]]
+        summary = summaries.setdefault(key, empty_hours_summary())
+
+        hours = row["hours"] or 0.0
+        admin = row["admin_hours"] or 0.0
+        project_id = row["task__project_id"]
+
+        summary["total_hours"] += hours
+        summary["admin_hours"] += admin
+        summary["productive_hours"] += hours - admin
+        summary["task_count"] += row["entry_count"]
+        summary["active_days"].add(row["daily_log__date"])
+        summary["project_hours"][project_id] = summary["project_hours"].get(project_id, 0.0) + hours
+
+    return summaries
+
+
+def _employee_week_filter(employee_weeks, prefix=""):
+    query = Q(pk__in=[])
+    for user_id, week_start_date in employee_weeks:
+        query |= Q(**{f"{prefix}user_id": user_id, f"{prefix}week_start_date": week_start_date})
+    return query
 
 
 def calculate_employee_performance(user, week_start_date):
-    week_end_date = week_start_date + timedelta(days=6)
-    timesheets = Timesheet.objects.filter(user=user, week_start_date=week_start_date)
-
-    total = 0.0
-    productive = 0.0
-    admin = 0.0
-    task_count = 0
-    unique_tasks = set()
-    project_hours = {}
-
-    for timesheet in timesheets:
-        for log in timesheet.daily_logs.all():
-            for entry in log.task_entries.select_related("task", "task__project"):
-                duration = entry.duration
-                task = entry.task
-                project_id = task.project_id
-
-                total += duration
-                task_count += 1
-                unique_tasks.add((log.date, task.id))
-
-                # Categorize time
-                if task.category in ["Admin", "Training", "Meeting", "Research"]:
-                    admin += duration
-                else:
-                    productive += duration
-
-                # Project time allocation
-                project_hours[project_id] = project_hours.get(project_id, 0.0) + duration
-
-    utilization = round((productive / 40.0) * 100, 2) if total > 0 else 0
-    context_switch = len(set(date for date, _ in unique_tasks))
-    overutilized = productive > 45
-    underutilized = productive < 30
-    balanced = not overutilized and not underutilized
-
-    # Multi-project load
-    multi_project_load = len(project_hours)
-
-    # High Utilization Weeks
-    high_weeks = EmployeePerformance.objects.filter(user=user, productive_hours__gt=45).count()
-
-    # Utilization trend: compare with previous week
-    previous_week = week_start_date - timedelta(days=7)
-    try:
-        last_week = EmployeePerformance.objects.get(user=user, week_start_date=previous_week)
-        trend = utilization - last_week.utilization_rate
-    except EmployeePerformance.DoesNotExist:
-        trend = 0.0
-
-    perf, _ = EmployeePerformance.objects.get_or_create(user=user, week_start_date=week_start_date)
-    perf.total_hours = total
-    perf.productive_hours = productive
-    perf.admin_hours = admin
-    perf.utilization_rate = utilization
-    perf.overutilized = overutilized
-    perf.underutilized = underutilized
-    perf.balanced = balanced
-    perf.context_switch_count = context_switch
-    perf.average_task_per_day = round(task_count / 5, 2) if task_count else 0
-    perf.project_time_allocation = project_hours
-    perf.multi_project_load = multi_project_load
-    perf.high_utilization_weeks = high_weeks
-    perf.utilization_trend = trend
-    perf.save()
-
-def calculate_employee_snapshot(user):
-    timesheets = Timesheet.objects.filter(user=user)
-
-    total = 0.0
-    productive = 0.0
-    admin = 0.0
-    context_switch_days = set()
-    task_count = 0
-    project_hours = {}
-
-    for ts in timesheets:
-        for log in ts.daily_logs.all():
-            for entry in log.task_entries.select_related("task", "task__project"):
-                duration = entry.duration
-                task = entry.task
-                project_id = task.project_id
-
-                total += duration
-                task_count += 1
-                context_switch_days.add(log.date)
-
-                if task.category in ["Admin", "Training", "Meeting", "Research"]:
-                    admin += duration
-                else:
-                    productive += duration
-
-                project_hours[project_id] = project_hours.get(project_id, 0) + duration
-
-    utilization = round((productive / total) * 100, 2) if total else 0.0
-    overutilized = productive > 45
-    underutilized = productive < 30
-    balanced = not overutilized and not underutilized
+    calculate_employee_performances([(user.id, week_start_date)])
+
+
+def calculate_employee_performances(employee_weeks, batch_size=EMPLOYEE_BATCH_SIZE):
+    """
+    Recompute EmployeePerformance for many (user_id, week_start_date) pairs.
+    Weeks are processed oldest first so utilization trends see the fresh
+    figures of the preceding week.
+    """
+    employee_weeks = sorted(set(employee_weeks), key=lambda key: (key[1], key[0]))
+    for start in range(0, len(employee_weeks), batch_size):
+        _calculate_employee_performance_batch(employee_weeks[start:start + batch_size])
 
-    return {
-        "total_hours": total,
-        "productive_hours": productive,
-        "admin_hours": admin,
-        "utilization_rate": utilization,
-        "average_task_per_day": round(task_count / len(timesheets), 2) if timesheets else 0.0,
-        "context_switch_count": len(context_switch_days),
-        "multi_project_load": len(project_hours),
-        "overutilized": overutilized,
-        "underutilized": underutilized,
-        "balanced": balanced,
-        "project_time_allocation": project_hours,
-    }
 
+def _calculate_employee_performance_batch(employee_weeks):
+    user_ids = {user_id for user_id, _ in employee_weeks}
+    summaries = summarise_employee_hours(Timesheet.objects.filter(_employee_week_filter(employee_weeks)))
 
+    # Current rows plus the previous week of each pair, for utilization trends
+    wanted = set(employee_weeks) | {(user_id, week - timedelta(days=7)) for user_id, week in employee_weeks}
+    perfs = {
+        (perf.user_id, perf.week_start_date): perf
+        for perf in EmployeePerformance.objects.filter(_employee_week_filter(wanted))
+    }
+
+    # High Utilization Weeks, adjusted in memory as rows in this batch change
+    high_weeks = dict(
+        EmployeePerformance.objects.filter(user_id__in=user_ids, productive_hours__gt=45)
+        .order_by()
+        .values("user_id")
+        .annotate(count=Count("id"))
+        .values_list("user_id", "count")
+    )
 
+    to_create = []
+    to_update = []
+    now = timezone.now()
+
+    for user_id, week_start_date in employee_weeks:
+        summary = summaries.get((user_id, week_start_date)) or empty_hours_summary()
+        total = summary["total_hours"]
+        productive = summary["productive_hours"]
+        task_count = summary["task_count"]
+
+        utilization = round((productive / 40.0) * 100, 2) if total > 0 else 0
+        overutilized = productive > 45
+        underutilized = productive < 30
+        balanced = not overutilized and not underutilized
+
+        # Utilization trend: compare with previous week
+        last_week = perfs.get((user_id, week_start_date - timedelta(days=7)))
+        trend = utilization - last_week.utilization_rate if last_week else 0.0
+
+        perf = perfs.get((user_id, week_start_date))
+        was_high = perf is not None and perf.productive_hours > 45
+        if perf is None:
+            perf = EmployeePerformance(user_id=user_id, week_start_date=week_start_date)
+            perfs[(user_id, week_start_date)] = perf
+            to_create.append(perf)
+        else:
+            to_update.append(perf)
+
+        perf.total_hours = total
+        perf.productive_hours = productive
+        perf.admin_hours = summary["admin_hours"]
+        perf.utilization_rate = utilization
+        perf.overutilized = overutilized
+        perf.underutilized = underutilized
+        perf.balanced = balanced
+        perf.context_switch_count = len(summary["active_days"])
+        perf.average_task_per_day = round(task_count / 5, 2) if task_count else 0
+        perf.project_time_allocation = summary["project_hours"]
+        perf.multi_project_load = len(summary["project_hours"])
+        perf.high_utilization_weeks = high_weeks.get(user_id, 0)
+        perf.utilization_trend = trend
+        perf.last_updated = now
+
+        high_weeks[user_id] = high_weeks.get(user_id, 0) + int(overutilized) - int(was_high)
+
+    with transaction.atomic():
+        EmployeePerformance.objects.bulk_create(to_create)
+        EmployeePerformance.objects.bulk_update(to_update, EMPLOYEE_PERFORMANCE_FIELDS)
+        invalidate_employee_performance(user_ids)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from timesheet_app.models import PerformanceDirtyKey
+from timesheet_app.utils.performance_calculator import (
+    calculate_employee_performances,
+    calculate_project_performances,
+    calculate_task_efficiencies,
+)
+
+
+def enqueue_performance_recompute(task_ids=(), project_ids=(), employee_weeks=()):
+    """
+    Mark tasks, projects and (user_id, week_start_date) pairs as dirty.
+    Everything is written with a single INSERT in the caller's transaction,
+    so a rolled back submission never leaves work behind.
+    """
+    keys = [PerformanceDirtyKey(kind=PerformanceDirtyKey.KIND_TASK, object_id=i) for i in set(task_ids)]
+    keys += [PerformanceDirtyKey(kind=PerformanceDirtyKey.KIND_PROJECT, object_id=i) for i in set(project_ids)]
+    keys += [
+        PerformanceDirtyKey(kind=PerformanceDirtyKey.KIND_EMPLOYEE_WEEK, object_id=user_id, week_start_date=week)
+        for user_id, week in set(employee_weeks)
+    ]
+    if not keys:
+        return
+
+    PerformanceDirtyKey.objects.bulk_create(keys)
+
+    # Local development has no worker running, so optionally drain right after commit
+    if getattr(settings, "PERFORMANCE_QUEUE_EAGER", False):
+        transaction.on_commit(drain_performance_queue)
+
+
+def process_performance_batch(batch_size=500):
+    """
+    Claim up to `batch_size` dirty keys, recompute each distinct entity once
+    and delete the claimed rows. Returns the number of rows consumed.
+    """
+    with transaction.atomic():
+        batch = list(
+            PerformanceDirtyKey.objects.select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", "kind", "object_id", "week_start_date")[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        # === Coalesce duplicates ===
+        task_ids = set()
+        project_ids = set()
+        employee_weeks = set()
+        for _, kind, object_id, week_start_date in batch:
+            if kind == PerformanceDirtyKey.KIND_TASK:
+                task_ids.add(object_id)
+            elif kind == PerformanceDirtyKey.KIND_PROJECT:
+                project_ids.add(object_id)
+            else:
+                employee_weeks.add((object_id, week_start_date))
+
+        # === Recompute ===
+        calculate_task_efficiencies(task_ids)
+        calculate_project_performances(project_ids)
+
+        # Users may have been deleted since their week was queued
+        user_ids = set(User.objects.filter(id__in={user_id for user_id, _ in employee_weeks}).values_list("id", flat=True))
+        calculate_employee_performances(key for key in employee_weeks if key[0] in user_ids)
+
+        PerformanceDirtyKey.objects.filter(id__in=[row[0] for row in batch]).delete()
+
+    return len(batch)
+
+
+def drain_performance_queue(batch_size=500):
+    """Process batches until the queue is empty. Returns the number of rows consumed."""
+    processed = 0
+    while True:
+        count = process_performance_batch(batch_size)
+        if not count:
+            return processed
+        processed += count
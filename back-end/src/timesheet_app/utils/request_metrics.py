@@ -0,0 +1,110 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds (ms) of the latency histogram buckets; anything slower lands in "+Inf"
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+SAMPLES_PER_ENDPOINT = 1000
+SLOW_QUERY_COUNT = 3
+SQL_PREVIEW_LENGTH = 200
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Queries, DB time and named timing spans collected while serving one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.slow_queries = []
+        self.spans = defaultdict(float)
+
+    def record_query(self, execute, sql, params, many, context):
+        """Django execute_wrapper: time every statement run on the wrapped connection."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_count += 1
+            self.db_seconds += elapsed
+            entry = (elapsed, self.query_count, sql[:SQL_PREVIEW_LENGTH])
+            if len(self.slow_queries) < SLOW_QUERY_COUNT:
+                heapq.heappush(self.slow_queries, entry)
+            else:
+                heapq.heappushpop(self.slow_queries, entry)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def slowest(self):
+        return [
+            {"ms": round(elapsed * 1000, 2), "sql": sql}
+            for elapsed, _, sql in sorted(self.slow_queries, reverse=True)
+        ]
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request_metrics(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's `name` span (no-op outside a request)."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.spans[name] += time.perf_counter() - started
+
+
+# === Rolling Per-Endpoint Samples ===
+
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_ENDPOINT))
+_samples_lock = threading.Lock()
+
+
+def record_sample(endpoint, duration_ms, query_count, db_ms):
+    with _samples_lock:
+        _samples[endpoint].append((duration_ms, query_count, db_ms))
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def endpoint_histograms():
+    """Latency histogram, percentiles and average query load of the recent requests to each endpoint."""
+    with _samples_lock:
+        snapshot = {endpoint: list(samples) for endpoint, samples in _samples.items()}
+
+    report = {}
+    for endpoint, samples in sorted(snapshot.items()):
+        durations = sorted(duration for duration, _, _ in samples)
+        buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for duration in durations:
+            buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, duration)] += 1
+
+        report[endpoint] = {
+            "count": len(samples),
+            "p50_ms": round(_percentile(durations, 0.50), 2),
+            "p95_ms": round(_percentile(durations, 0.95), 2),
+            "p99_ms": round(_percentile(durations, 0.99), 2),
+            "avg_queries": round(sum(queries for _, queries, _ in samples) / len(samples), 2),
+            "avg_db_ms": round(sum(db for _, _, db in samples) / len(samples), 2),
+            "histogram": dict(zip([f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + ["+Inf"], buckets)),
+        }
+    return report
@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Sum, Value, When
+
+from timesheet_app.models import Task
+
+
+def entry_hours_by_task(task_entries):
+    """Total duration per task id for a TaskEntry queryset, from one GROUP BY."""
+    return dict(
+        task_entries.order_by()
+        .values("task_id")
+        .annotate(hours=Sum("duration"))
+        .values_list("task_id", "hours")
+    )
+
+
+def apply_logged_hours_deltas(deltas):
+    """
+    Add each task's hour delta to Task.logged_hours in a single
+    `UPDATE ... SET logged_hours = logged_hours + CASE id WHEN ... END`, so
+    concurrent submissions touching the same task never overwrite each other.
+    The rows are locked in id order first to keep lock ordering consistent
+    between transactions.
+    """
+    deltas = {task_id: delta for task_id, delta in deltas.items() if abs(delta) >= 1e-9}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        list(Task.objects.select_for_update().filter(id__in=deltas).order_by("id").values_list("id", flat=True))
+        Task.objects.filter(id__in=deltas).update(
+            logged_hours=F("logged_hours") + Case(
+                *[When(id=task_id, then=Value(delta)) for task_id, delta in deltas.items()],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+
+def logged_hours_deltas(added=(), removed=()):
+    """Per-task hour deltas from (task_id, duration) pairs that were added and removed."""
+    deltas = defaultdict(float)
+    for pairs, sign in ((added, 1), (removed, -1)):
+        for task_id, duration in pairs:
+            deltas[task_id] += sign * duration
+    return deltas
@@ -1,4 +1,3 @@
-from tokenize import TokenError
 from django.contrib.auth import authenticate , logout
 from rest_framework.decorators import api_view
 from..models import UserRole
@@ -10,13 +9,16 @@ from ..serializers.user_serializer import UserSerializer
 from ..serializers.login_serializer import LoginSerializer
 from rest_framework.status import  HTTP_400_BAD_REQUEST , HTTP_201_CREATED , HTTP_200_OK , HTTP_401_UNAUTHORIZED
 from rest_framework_simplejwt.tokens import RefreshToken , AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+from ..permissions import request_role
 from ..utils.constants import USER_REGISTERED_MESSAGE , USER_LOGGEDIN_MESSAGE , INVAID_CREDENTIALS_MESSAGE , USER_LOGGEDOUT_MESSAGE , REFRESH_TOKEN_REQUIRED_MESSAGE
 
 
 
 def get_tokens_for_user(user):
     refresh =  RefreshToken.for_user(user)
-    refresh["role"] = user.userrole.role if hasattr(user, "userrole") else "employee"
+    userrole = getattr(user, "userrole", None)
+    refresh["role"] = userrole.role if userrole else "employee"
     refresh.access_token["role"] = refresh["role"]
     return {
 
@@ -39,9 +41,10 @@ def refresh_access_token(request):
         user_id = refresh["user_id"] 
         from django.contrib.auth import get_user_model
         User = get_user_model()
-        user = User.objects.get(id=user_id)
+        user = User.objects.filter(id=user_id, is_active=True).first()
+        if user is None:
+            return Response({"detail": "User is inactive or no longer exists"}, status=HTTP_401_UNAUTHORIZED)
 
-       
         tokens = get_tokens_for_user(user)
 
         return Response({ "access": tokens['access'] }, status=HTTP_200_OK)
@@ -53,11 +56,7 @@ def refresh_access_token(request):
 @permission_classes([IsAuthenticated])
 def get_logged_in_user(request):
     user = request.user
-
-    try:
-        role = user.userrole.role
-    except UserRole.DoesNotExist:
-        role = "employee"
+    role = request_role(request) or "employee"
 
     return Response({
         "id": user.id,
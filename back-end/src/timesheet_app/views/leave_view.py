@@ -3,11 +3,18 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_200_OK
 from timesheet_app.models.leave_model import LeaveRequest
 from timesheet_app.serializers.leave_serializer import LeaveRequestSerializer
-from rest_framework.permissions import IsAuthenticated, IsManager, IsEmployee
-from timesheet_app.models import UserRole
+from rest_framework.permissions import IsAuthenticated
+from timesheet_app.permissions import IsManager, IsEmployee, request_role
+from timesheet_app.utils.calendar import count_working_days
+from timesheet_app.utils.org_hierarchy import direct_reports
 from datetime import date
 
 
+def approved_working_days(leave_requests):
+    ranges = list(leave_requests.values_list("start_date", "end_date"))
+    return int(count_working_days([start for start, _ in ranges], [end for _, end in ranges]).sum())
+
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsEmployee])
@@ -122,11 +129,8 @@ def get_leave_snapshot(request):
     # Get all leave requests for the user
     leave_requests = LeaveRequest.objects.filter(user=user)
 
-    # Calculate approved leave days
-    approved_days = sum([
-        (leave.end_date - leave.start_date).days + 1
-        for leave in leave_requests.filter(status="approved")
-    ])
+    # Calculate approved leave days (working days only)
+    approved_days = approved_working_days(leave_requests.filter(status="approved"))
 
     total_entitled_days = 35
     remaining_days = max(total_entitled_days - approved_days, 0)
@@ -145,23 +149,21 @@ def get_leave_snapshot(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsManager])
 def get_manager_leave_snapshot(request):
-    user_role = getattr(request.user, 'userrole', None)
-
-    if not user_role or user_role.role != 'manager':
+    if request_role(request) != 'manager':
         return Response({"error": "Only managers can access this view."}, status=403)
 
     manager = request.user
 
-    managed_user_ids = UserRole.objects.filter(manager=manager).values_list("user_id", flat=True)
+    managed_user_ids = direct_reports(manager.id, request)
 
     team_requests = LeaveRequest.objects.filter(user_id__in=managed_user_ids)
 
     today = date.today()
-    team_on_leave = team_requests.filter(status="approved", start_date__lte=today, end_date__gte=today)
+    team_on_leave = team_requests.filter(status="approved", start_date__lte=today, end_date__gte=today).select_related("user")
     pending_requests = team_requests.filter(status="pending").count()
 
     my_requests = LeaveRequest.objects.filter(user=manager, status="approved")
-    my_approved_days = sum([(leave.end_date - leave.start_date).days + 1 for leave in my_requests])
+    my_approved_days = approved_working_days(my_requests)
     manager_remaining_days = max(35 - my_approved_days, 0)
 
     on_leave_list = [
@@ -0,0 +1,17 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.status import HTTP_200_OK
+
+from timesheet_app.permissions import IsAdmin
+from timesheet_app.utils.request_metrics import endpoint_histograms
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def get_request_metrics(request):
+    """Latency percentiles, histogram and query load of the recent requests to each endpoint in this process."""
+    return Response({
+        "message": "Request metrics retrieved.",
+        "data": endpoint_histograms()
+    }, status=HTTP_200_OK)
@@ -5,10 +5,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
 from timesheet_app.models import Project, Task
 from django.contrib.auth.models import User
+from django.db.models import Count, F, Q, Sum
 from django.utils.timezone import now
 from timesheet_app.models import UserRole
-from timesheet_app.utils.performance_calculator import calculate_employee_snapshot
-from rest_framework.permissions import IsAuthenticated, IsManager, IsAdmin, IsEmployee
+from timesheet_app.utils.employee_snapshot import load_employee_snapshot
+from timesheet_app.utils.org_hierarchy import direct_reports, is_manager_of
+from timesheet_app.utils.performance_cache import KIND_EMPLOYEE, KIND_MANAGER, KIND_PROJECT, cached_payload, cache_stats
+from timesheet_app.permissions import IsManager, IsAdmin, IsEmployee, request_role
 from timesheet_app.models.performance_model import (
     ProjectPerformance,
     EmployeePerformance,
@@ -16,62 +19,83 @@ from timesheet_app.models.performance_model import (
 )
 from timesheet_app.serializers.performance_serializer import ProjectPerformanceSerializer, TaskEfficiencySerializer, EmployeePerformanceSerializer
 
+# Endpoints whose responses are cached until their performance rows are recomputed
+CACHED_ENDPOINTS = ["project_performance", "project_task_efficiency", "employee_performance", "snapshot_summary"]
+
+
+def _project_performance_payload(project_id):
+    project = Project.objects.filter(id=project_id).first()
+    if project is None:
+        return {"found": False}
+    perf = ProjectPerformance.objects.filter(project=project).first()
+    return {
+        "found": True,
+        "manager_id": project.manager_id,
+        "data": ProjectPerformanceSerializer(perf).data if perf else None,
+    }
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsManager])
 def get_project_performance(request, project_id):
-    try:
-        project = Project.objects.get(id=project_id)
+    payload = cached_payload(
+        "project_performance", [project_id], [(KIND_PROJECT, project_id)],
+        lambda: _project_performance_payload(project_id),
+    )
 
+    if payload["found"]:
         #  Ensure manager owns this project
-        if project.manager != request.user and not request.user.is_staff:
+        if payload["manager_id"] != request.user.id and not request.user.is_staff:
             return Response({"detail": "Access denied."}, status=403)
 
-        perf = ProjectPerformance.objects.get(project=project)
-        serializer = ProjectPerformanceSerializer(perf)
-        return Response({
-            "message": "Project performance retrieved successfully.",
-            "data": serializer.data
-        }, status=HTTP_200_OK)
-    except (Project.DoesNotExist, ProjectPerformance.DoesNotExist):
-        return Response({
-            "message": "Project performance not found.",
-            "data": {}
-        }, status=HTTP_404_NOT_FOUND)
+        if payload["data"] is not None:
+            return Response({
+                "message": "Project performance retrieved successfully.",
+                "data": payload["data"]
+            }, status=HTTP_200_OK)
+
+    return Response({
+        "message": "Project performance not found.",
+        "data": {}
+    }, status=HTTP_404_NOT_FOUND)
+
+
+def _employee_performance_payload(user_id, week_start):
+    perf = EmployeePerformance.objects.filter(user_id=user_id, week_start_date=week_start).first()
+    return {"data": EmployeePerformanceSerializer(perf).data if perf else None}
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_employee_performance(request, user_id, week_start):
-    try:
-        from django.contrib.auth.models import User
-        from timesheet_app.models import UserRole
-
-        target_user = User.objects.get(id=user_id)
-        perf = EmployeePerformance.objects.get(user=target_user, week_start_date=week_start)
-
-        #  Allow if current user is the target user
-        if request.user == target_user:
-            pass
-        # Allow if manager of the employee
-        elif hasattr(target_user, 'userrole') and target_user.userrole.manager == request.user:
-            pass
-        # Allow staff
-        elif request.user.is_staff:
-            pass
-        else:
-            return Response({"detail": "Access denied."}, status=403)
-
-        serializer = EmployeePerformanceSerializer(perf)
-        return Response({
-            "message": "Employee performance retrieved successfully.",
-            "data": serializer.data
-        }, status=HTTP_200_OK)
-    except (EmployeePerformance.DoesNotExist, User.DoesNotExist):
+    # Rows are removed with their user, so a missing user is simply a missing row
+    payload = cached_payload(
+        "employee_performance", [user_id, week_start], [(KIND_EMPLOYEE, user_id)],
+        lambda: _employee_performance_payload(user_id, week_start),
+    )
+    if payload["data"] is None:
         return Response({
             "message": "Employee performance not found.",
             "data": {}
         }, status=HTTP_404_NOT_FOUND)
 
+    #  Allow if current user is the target user
+    if request.user.id == user_id:
+        pass
+    # Allow if manager of the employee
+    elif is_manager_of(request.user.id, user_id, request):
+        pass
+    # Allow staff
+    elif request.user.is_staff:
+        pass
+    else:
+        return Response({"detail": "Access denied."}, status=403)
+
+    return Response({
+        "message": "Employee performance retrieved successfully.",
+        "data": payload["data"]
+    }, status=HTTP_200_OK)
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -84,7 +108,7 @@ def get_task_efficiency(request, task_id):
         is_assigned = task.assigned_to == request.user
         is_manager = project.manager == request.user
         is_staff = request.user.is_staff
-        is_teammate = Task.objects.filter(id=task.id, assigned_to__userrole__manager=request.user).exists()
+        is_teammate = is_manager_of(request.user.id, task.assigned_to_id, request)
 
         if not (is_assigned or is_manager or is_teammate or is_staff):
             return Response({"detail": "Access denied."}, status=403)
@@ -99,32 +123,42 @@ def get_task_efficiency(request, task_id):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_task_efficiency_for_project(request, project_id):
-    from timesheet_app.models.performance_model import TaskEfficiency
-    from timesheet_app.serializers.performance_serializer import TaskEfficiencySerializer
+    payload = cached_payload(
+        "project_task_efficiency", [project_id], [(KIND_PROJECT, project_id)],
+        lambda: _project_task_efficiency_payload(project_id),
+    )
+    if not payload["found"]:
+        return Response({"message": "Project not found."}, status=404)
 
-    try:
-        project = Project.objects.get(id=project_id)
+    if payload["manager_id"] != request.user.id and not request.user.is_staff:
+        return Response({"detail": "Access denied."}, status=403)
 
-        if project.manager != request.user and not request.user.is_staff:
-            return Response({"detail": "Access denied."}, status=403)
+    return Response({
+        "message": f"Task performance report for project: {payload['project_name']}",
+        "project_id": project_id,
+        "total_tasks": payload["total_tasks"],
+        "data": payload["data"]
+    }, status=200)
 
-        # Get all tasks in this project
-        tasks = Task.objects.filter(project=project)
 
-        # Fetch efficiencies for those tasks
-        efficiencies = TaskEfficiency.objects.filter(task__in=tasks).select_related("task")
+def _project_task_efficiency_payload(project_id):
+    project = Project.objects.filter(id=project_id).first()
+    if project is None:
+        return {"found": False}
 
-        serializer = TaskEfficiencySerializer(efficiencies, many=True)
+    # Get all tasks in this project
+    tasks = Task.objects.filter(project=project)
 
-        return Response({
-            "message": f"Task performance report for project: {project.project_name}",
-            "project_id": project_id,
-            "total_tasks": tasks.count(),
-            "data": serializer.data
-        }, status=200)
+    # Fetch efficiencies for those tasks
+    efficiencies = TaskEfficiency.objects.filter(task__in=tasks).select_related("task__project")
 
-    except Project.DoesNotExist:
-        return Response({"message": "Project not found."}, status=404)
+    return {
+        "found": True,
+        "manager_id": project.manager_id,
+        "project_name": project.project_name,
+        "total_tasks": tasks.count(),
+        "data": TaskEfficiencySerializer(efficiencies, many=True).data,
+    }
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_employee_snapshot(request, user_id):
@@ -136,16 +170,12 @@ def get_employee_snapshot(request, user_id):
     is_self = request.user.id == user.id
     is_admin = request.user.is_staff
 
-   
-    try:
-        is_manager = hasattr(user, 'userrole') and user.userrole.manager_id == request.user.id
-    except AttributeError:
-        is_manager = False
+    is_manager = is_manager_of(request.user.id, user.id, request)
 
     if not (is_self or is_admin or is_manager):
         return Response({"detail": "Access denied."}, status=403)
 
-    snapshot = calculate_employee_snapshot(user)
+    snapshot = load_employee_snapshot(user)
     return Response({
         "message": "Employee snapshot retrieved successfully.",
         "data": snapshot
@@ -207,7 +237,7 @@ def get_employee_tasks_for_project(request, project_id, employee_id):
             return Response({"detail": "Access denied."}, status=403)
 
         tasks = Task.objects.filter(project=project, assigned_to__id=employee_id)
-        efficiencies = TaskEfficiency.objects.filter(task__in=tasks).select_related("task")
+        efficiencies = TaskEfficiency.objects.filter(task__in=tasks).select_related("task__project")
         serializer = TaskEfficiencySerializer(efficiencies, many=True)
 
         return Response({
@@ -220,39 +250,61 @@ def get_employee_tasks_for_project(request, project_id, employee_id):
 @permission_classes([IsAuthenticated])
 def get_performance_snapshot_summary(request):
     user = request.user
-    role = getattr(user, 'userrole', None)
+    role = request_role(request)
+
+    if role == "manager" or user.is_staff:
+        view, scope = "manager", (KIND_MANAGER, user.id)
+    elif role == "employee":
+        view, scope = "employee", (KIND_EMPLOYEE, user.id)
+    else:
+        return Response({"message": "Snapshot summary loaded", "data": []}, status=HTTP_200_OK)
+
+    # Team membership and the rolling four-week window are part of the key, not the version
+    team = ",".join(map(str, sorted(direct_reports(user.id, request))))
+    summary = cached_payload(
+        "snapshot_summary", [view, user.id, now().date(), team], [scope],
+        lambda: _snapshot_summary(user, view, request),
+    )
+    return Response({"message": "Snapshot summary loaded", "data": summary}, status=HTTP_200_OK)
+
 
+def _snapshot_summary(user, view, request):
     summary = []
 
     # === Manager or Admin Overview ===
-    if user.is_staff or (role and role.role == "manager"):
+    if view == "manager":
+        # One conditional aggregate per model for the whole dashboard
+        projects = ProjectPerformance.objects.filter(project__manager=user).aggregate(
+            over_budget=Count("id", filter=Q(over_budget=True)),
+            stalled=Count("id", filter=Q(stalled_tasks_count__gt=3)),
+        )
+        team = EmployeePerformance.objects.filter(
+            user_id__in=direct_reports(user.id, request),
+            week_start_date__gte=now().date() - timedelta(weeks=4)
+        ).aggregate(
+            weekly_tasks=Sum(F("average_task_per_day") * 5),
+            weeks=Count("id"),
+            underutilized=Count("user", filter=Q(utilization_rate__lt=30), distinct=True),
+        )
+
         # 1. Over Budget Projects
-        over_budget_count = ProjectPerformance.objects.filter(over_budget=True, project__manager=user).count()
         summary.append({
             "id": "budget",
             "label": "Over Budget Projects",
-            "stat": f"{over_budget_count} projects",
+            "stat": f"{projects['over_budget']} projects",
             "updated": "Today"
         })
 
         # 2. Stalled Tasks
-        stalled_projects = ProjectPerformance.objects.filter(
-            stalled_tasks_count__gt=3,
-            project__manager=user
-        ).count()
         summary.append({
             "id": "stalls",
             "label": "Projects with Stalled Tasks",
-            "stat": f"{stalled_projects} projects",
+            "stat": f"{projects['stalled']} projects",
             "updated": "Today"
         })
 
         # 3. Team Velocity (average tasks/week)
-        recent_perfs = EmployeePerformance.objects.filter(
-            user__userrole__manager=user,
-            week_start_date__gte=now().date() - timedelta(weeks=4)
-        )
-        avg_velocity = round(sum(p.average_task_per_day * 5 for p in recent_perfs) / (recent_perfs.count() or 1), 1)
+        avg_velocity = round((team["weekly_tasks"] or 0) / (team["weeks"] or 1), 1)
         summary.append({
             "id": "velocity",
             "label": "Avg Team Velocity",
@@ -261,18 +313,16 @@ def get_performance_snapshot_summary(request):
         })
 
         # 4. Underutilized Employees
-        underutilized = recent_perfs.filter(utilization_rate__lt=30).values('user').distinct().count()
         summary.append({
             "id": "utilization",
             "label": "Underutilized Employees",
-            "stat": f"{underutilized} team members",
+            "stat": f"{team['underutilized']} team members",
             "updated": "This Week"
         })
 
     # === Employee Overview ===
-    elif role and role.role == "employee":
-        from timesheet_app.utils.performance_calculator import calculate_employee_snapshot
-        snapshot = calculate_employee_snapshot(user)
+    else:
+        snapshot = load_employee_snapshot(user)
         summary = [
             {
                 "id": "personal_utilization",
@@ -294,19 +344,19 @@ def get_performance_snapshot_summary(request):
             }
         ]
 
-    return Response({"message": "Snapshot summary loaded", "data": summary}, status=HTTP_200_OK)
+    return summary
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsManager])
 def get_managed_employees(request):
     try:
         # All users whose manager is the currently logged-in manager
-        users = User.objects.filter(userrole__manager=request.user)
+        users = User.objects.filter(id__in=direct_reports(request.user.id, request))
         data = [{"id": u.id, "username": u.username} for u in users]
         return Response({"message": "Managed employees retrieved", "data": data}, status=200)
     except Exception as e:
         return Response({"message": "Failed to fetch employees", "error": str(e)}, status=500)
     
-api_view(["GET"])
+@api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_employee_task_efficiency(request, employee_id):
     try:
@@ -354,3 +404,13 @@ def get_employee_info(request, employee_id):
     except User.DoesNotExist:
         return Response({"error": "Employee not found."}, status=404)
 
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def get_performance_cache_stats(request):
+    """Hit/miss counters of the cached performance endpoints, for tuning PERFORMANCE_CACHE_TIMEOUT."""
+    return Response({
+        "message": "Performance cache statistics retrieved.",
+        "data": cache_stats(CACHED_ENDPOINTS)
+    }, status=HTTP_200_OK)
@@ -53,7 +53,7 @@ def update_project_detail(request , pk):
 def get_projects(request):
     response = None
     
-    projects = Project.objects.all()
+    projects = Project.objects.select_related("manager")
     serializer = ProjectSerializer(projects , many=True)
     
     data = {
@@ -22,7 +22,7 @@ def create_task(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_tasks(request):
-    tasks = Task.objects.all()
+    tasks = Task.objects.select_related("project", "assigned_to")
     serializer = TaskSerializer(tasks, many=True)
     return Response({"message": "All tasks retrieved successfully.", "data": serializer.data}, status=HTTP_200_OK)
 
@@ -88,7 +88,7 @@ def get_assigned_tasks(request):
     tasks = Task.objects.filter(
         Q(assigned_to=user, requires_assignment=True) |
         Q(requires_assignment=False)
-    ).select_related("project")
+    ).select_related("project", "assigned_to")
 
     serializer = TaskSerializer(tasks, many=True)
     return Response(serializer.data, status=HTTP_200_OK)
@@ -1,18 +1,24 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsManager, IsAdmin, IsEmployee
+from rest_framework.permissions import IsAuthenticated
+from timesheet_app.permissions import IsManager, IsAdmin, IsEmployee
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 from django.shortcuts import get_object_or_404
 from datetime import timedelta, datetime
-from timesheet_app.models import UserRole
 
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Sum, Exists, OuterRef, Case, When, Value, CharField, TextField
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
 
-from timesheet_app.serializers.timesheet_serializer import TimesheetSerializer, DailyLogSerializer, TaskEntrySerializer, ProjectSerializer
-from timesheet_app.models.timesheet_model import Timesheet, DailyLog, TaskEntry,  Project, Task
+from timesheet_app.serializers.timesheet_serializer import TimesheetSerializer, TimesheetSummarySerializer, DailyLogSerializer, TaskEntrySerializer, ProjectSerializer
+from timesheet_app.models.timesheet_model import Timesheet, DailyLog, TaskEntry
+from timesheet_app.utils.performance_queue import enqueue_performance_recompute
+from timesheet_app.utils.employee_snapshot import delete_timesheets
+from timesheet_app.utils.pagination import paginate_timesheets, parse_page_size, InvalidCursor
+from timesheet_app.utils.org_hierarchy import direct_reports, is_manager_of
+from timesheet_app.utils.request_metrics import timed
 from timesheet_app.utils.constants import (
     PERMISSION_DENIED_MESSAGE,
     TIMESHEET_CREATED_SUCCESS_MESSAGE,
@@ -28,19 +34,7 @@ def create_timesheet(request):
 
     if serializer.is_valid():
         timesheet = serializer.save()
-
-        
-        task_ids = []
-        for log in request.data.get("daily_logs", []):
-            for entry in log.get("task_entries", []):
-                task_ids.append(entry.get("task_id"))
-
-        project_ids = Task.objects.filter(id__in=task_ids).values_list("project_id", flat=True).distinct()
-        timesheet.projects.set(Project.objects.filter(id__in=project_ids))
-
-        timesheet.update_hours()
-
-
+        timesheet = Timesheet.objects.with_full_detail().get(pk=timesheet.pk)
         return Response({
             "message": TIMESHEET_CREATED_SUCCESS_MESSAGE,
             "data": TimesheetSerializer(timesheet).data
@@ -74,37 +68,44 @@ def update_timesheet(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsEmployee])
 def list_all_timesheets(request):
-    timesheets = Timesheet.objects.filter(user=request.user).prefetch_related(
-        "daily_logs", "projects", "user__userrole__manager"
-    )
-    serializer = TimesheetSerializer(timesheets, many=True)
+    timesheets = Timesheet.objects.filter(user=request.user)
+
+    if request.GET.get("view") == "summary":
+        rows = timesheets.order_by("-week_start_date", "-id").values(*TimesheetSummarySerializer.source_fields)
+        serializer = TimesheetSummarySerializer(rows, many=True)
+    else:
+        serializer = TimesheetSerializer(timesheets.with_full_detail(), many=True)
 
+    with timed("serialize"):
+        data = serializer.data
     return Response({
         "message": "Timesheets have been fetched correctly",
-        "data": serializer.data
+        "data": data
     }, status=HTTP_200_OK)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_by_id(request, pk):
-    timesheet = get_object_or_404(Timesheet, id=pk)
+    timesheet = get_object_or_404(Timesheet.objects.with_full_detail(), id=pk)
 
 
     if timesheet.user == request.user:
         pass
 
     
-    elif hasattr(timesheet.user, "userrole") and timesheet.user.userrole.manager == request.user:
+    elif is_manager_of(request.user.id, timesheet.user_id, request):
         pass
 
     else:
         return Response({"message": PERMISSION_DENIED_MESSAGE}, status=HTTP_403_FORBIDDEN)
 
     serializer = TimesheetSerializer(timesheet)
+    with timed("serialize"):
+        data = serializer.data
     return Response({
         "message": "Timesheet fetched successfully.",
-        "data": serializer.data
+        "data": data
     }, status=HTTP_200_OK)
 
 
@@ -112,7 +113,7 @@ def get_by_id(request, pk):
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def delete_all_timesheets(request):
-    Timesheet.objects.filter(user=request.user).delete()
+    delete_timesheets(Timesheet.objects.filter(user=request.user))
     return Response({"message": "All timesheets deleted successfully"}, status=HTTP_200_OK)
 
 
@@ -129,7 +130,7 @@ def check_timesheet_for_week(request):
     except ValueError:
         return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=HTTP_400_BAD_REQUEST)
 
-    timesheet = Timesheet.objects.filter(user=request.user, week_start_date=week_start_date).first()
+    timesheet = Timesheet.objects.with_full_detail().filter(user=request.user, week_start_date=week_start_date).first()
     if not timesheet:
         return Response({"exists": False}, status=HTTP_200_OK)
 
@@ -207,36 +208,153 @@ def manager_reject_timesheet(request, pk):
     return Response({"message": "Timesheet rejected successfully."}, status=HTTP_200_OK)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsManager])
+def manager_bulk_review_timesheets(request):
+    """
+    Approve or reject many timesheets at once.
+    Expected payload: { "items": [ { "id": 1, "action": "approve" },
+                                   { "id": 2, "action": "reject", "rejection_reason": "..." } ] }
+    """
+    items = request.data.get("items")
+    if not isinstance(items, list) or not items:
+        return Response({"error": "items must be a non-empty list."}, status=HTTP_400_BAD_REQUEST)
+
+    decisions = {}
+    for item in items:
+        try:
+            timesheet_id = int(item.get("id"))
+        except (AttributeError, TypeError, ValueError):
+            return Response({"error": "Every item needs an integer id."}, status=HTTP_400_BAD_REQUEST)
+
+        action = item.get("action")
+        if action == "approve":
+            decisions[timesheet_id] = ("Approved", None)
+        elif action == "reject":
+            rejection_reason = (item.get("rejection_reason") or "").strip()
+            if not rejection_reason:
+                return Response({"error": f"A rejection reason is required for timesheet {timesheet_id}."}, status=HTTP_400_BAD_REQUEST)
+            decisions[timesheet_id] = ("Rejected", rejection_reason)
+        else:
+            return Response({"error": "action must be 'approve' or 'reject'."}, status=HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        # Ownership and current status for every requested id in one query
+        owned = {
+            row[0]: row
+            for row in Timesheet.objects.select_for_update()
+            .filter(id__in=decisions, user__userrole__manager=request.user)
+            .values_list("id", "approval_status", "user_id", "week_start_date")
+        }
+        not_owned = sorted(set(decisions) - owned.keys())
+        if not_owned:
+            return Response({"error": "Not authorized to review these timesheets.", "ids": not_owned}, status=HTTP_403_FORBIDDEN)
+
+        pending = [timesheet_id for timesheet_id, row in owned.items() if row[1] == "Pending"]
+        if pending:
+            Timesheet.objects.filter(id__in=pending, approval_status="Pending").update(
+                approval_status=Case(*[When(id=i, then=Value(decisions[i][0])) for i in pending], output_field=CharField()),
+                rejection_reason=Case(*[When(id=i, then=Value(decisions[i][1])) for i in pending], output_field=TextField()),
+                manager=request.user,
+            )
+
+        # update() skips post_save, so queue one coalesced recompute for all approvals
+        approved = [i for i in pending if decisions[i][0] == "Approved"]
+        if approved:
+            entries = (
+                TaskEntry.objects.filter(daily_log__timesheet_id__in=approved)
+                .values_list("task_id", "task__project_id")
+                .distinct()
+            )
+            enqueue_performance_recompute(
+                task_ids={task_id for task_id, _ in entries},
+                project_ids={project_id for _, project_id in entries},
+                employee_weeks={(owned[i][2], owned[i][3]) for i in approved},
+            )
+
+    return Response({
+        "message": f"{len(pending)} timesheets reviewed.",
+        "approved": approved,
+        "rejected": [i for i in pending if decisions[i][0] == "Rejected"],
+        "skipped": sorted(set(owned) - set(pending)),
+    }, status=HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsManager])
 def get_all_timesheets(request):
-    managed_employees = UserRole.objects.filter(manager=request.user).values_list("user", flat=True)
-    timesheets = Timesheet.objects.filter(user__in=managed_employees).order_by("-week_start_date")
+    """
+    Team timesheets, newest first, one page (page_size, default 50) at a time.
+    Pass the returned next_cursor as cursor for the following page; it is null
+    on the last one. Filters: status, employee, start_date, end_date, project,
+    and view=summary for header fields only.
+    """
+    timesheets = Timesheet.objects.filter(user_id__in=direct_reports(request.user.id, request))
+    summary_view = request.GET.get("view") == "summary"
+
+    status = request.GET.get("status")
+    employee = request.GET.get("employee")
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    project = request.GET.get("project")
+
+    try:
+        page_size = parse_page_size(request.GET.get("page_size"))
+        if employee:
+            timesheets = timesheets.filter(user_id=int(employee))
+        if project:
+            timesheets = timesheets.filter(Exists(
+                TaskEntry.objects.filter(daily_log__timesheet=OuterRef("pk"), task__project_id=int(project))
+            ))
+        if start_date:
+            timesheets = timesheets.filter(week_start_date__gte=datetime.strptime(start_date, "%Y-%m-%d").date())
+        if end_date:
+            timesheets = timesheets.filter(week_start_date__lte=datetime.strptime(end_date, "%Y-%m-%d").date())
+    except ValueError:
+        return Response({"error": "Invalid filter. Use integer ids and YYYY-MM-DD dates."}, status=HTTP_400_BAD_REQUEST)
 
-    if not timesheets.exists():
-        return Response({"message": "No timesheets found for your team.", "data": []}, status=HTTP_200_OK)
+    if status:
+        timesheets = timesheets.filter(approval_status__iexact=status)
 
-    serializer = TimesheetSerializer(timesheets, many=True)
+    if summary_view:
+        timesheets = timesheets.values(*TimesheetSummarySerializer.source_fields)
+    else:
+        timesheets = timesheets.with_full_detail()
+
+    cursor = request.GET.get("cursor")
+    try:
+        page, next_cursor = paginate_timesheets(timesheets, cursor, page_size)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=HTTP_400_BAD_REQUEST)
+
+    if not page and not cursor:
+        return Response({"message": "No timesheets found for your team.", "data": [], "next_cursor": None}, status=HTTP_200_OK)
+
+    serializer = TimesheetSummarySerializer(page, many=True) if summary_view else TimesheetSerializer(page, many=True)
+    with timed("serialize"):
+        data = serializer.data
     return Response({
         "message": "All timesheets fetched successfully.",
-        "data": serializer.data
+        "data": data,
+        "next_cursor": next_cursor
     }, status=HTTP_200_OK)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsManager])
 def get_timesheet_by_manager(request, pk):
-    timesheet = get_object_or_404(Timesheet, id=pk)
+    timesheet = get_object_or_404(Timesheet.objects.with_full_detail(), id=pk)
 
-    if timesheet.user != request.user:
-        userrole = getattr(timesheet.user, "userrole", None)
-        if not userrole or userrole.manager != request.user:
+    if timesheet.user_id != request.user.id:
+        if not is_manager_of(request.user.id, timesheet.user_id, request):
             return Response({"error": "You do not have permission to view this timesheet."}, status=HTTP_403_FORBIDDEN)
 
     serializer = TimesheetSerializer(instance=timesheet)
+    with timed("serialize"):
+        data = serializer.data
     return Response({
         "message": TIMESHEET_FETCHED_SUCCESS_MESSAGE,
-        "data": serializer.data
+        "data": data
     }, status=HTTP_200_OK)
 
 
@@ -244,7 +362,7 @@ def get_timesheet_by_manager(request, pk):
 @permission_classes([IsAuthenticated])
 def delete_all_timesheets(request):
     user = request.user
-    Timesheet.objects.filter(user=user).delete()
+    delete_timesheets(Timesheet.objects.filter(user=user))
     return Response({"message": "All timesheets deleted successfully."}, status=HTTP_200_OK)
 
 @api_view(["DELETE"])
@@ -254,10 +372,10 @@ def delete_employee_timesheets(request, user_id):
 
     try:
         employee = User.objects.get(id=user_id)
-        if employee.userrole.manager != request.user:
+        if not is_manager_of(request.user.id, employee.id, request):
             return Response({"error": "Not authorized to delete this user's timesheets."}, status=HTTP_403_FORBIDDEN)
 
-        Timesheet.objects.filter(user=employee).delete()
+        delete_timesheets(Timesheet.objects.filter(user=employee))
         return Response({"message": f"All timesheets for {employee.username} deleted successfully."}, status=HTTP_200_OK)
     except User.DoesNotExist:
         return Response({"error": "User not found."}, status=HTTP_400_BAD_REQUEST)
@@ -269,7 +387,7 @@ def compare_timesheet_history(request, pk):
     timesheet = get_object_or_404(Timesheet, id=pk)
 
     # Only allow manager of this employee
-    if timesheet.user.userrole.manager != request.user:
+    if not is_manager_of(request.user.id, timesheet.user_id, request):
         return Response({"error": "Not authorized."}, status=HTTP_403_FORBIDDEN)
 
     # Get previous timesheets of the same employee, before this one
@@ -92,10 +92,18 @@ const TimesheetList = () => {
     const endpoint = role === "manager" ? API_MANAGER_TIMESHEETS : API_EMPLOYEE_TIMESHEETS;
 
     try {
-      const response = await axios.get(endpoint, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setTimesheets(response.data.data);
+      let rows = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(endpoint, {
+          headers: { Authorization: `Bearer ${token}` },
+          params: cursor ? { cursor } : {},
+        });
+        rows = rows.concat(response.data.data);
+        // Only the manager list is paged; follow next_cursor until the last page
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setTimesheets(rows);
     } catch (error) {
       console.error("Failed to fetch timesheets:", error);
       toast("Failed to fetch timesheets.");
@@ -26,13 +26,20 @@ const TimesheetHistory = () => {
       if (!token) return;
 
       try {
-        const response = await axios.get(API_GET_USER_TIMESHEETS, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
+        let rows = [];
+        let cursor = null;
+        do {
+          const response = await axios.get(API_GET_USER_TIMESHEETS, {
+            headers: { Authorization: `Bearer ${token}` },
+            params: cursor ? { cursor } : {},
+          });
+          rows = rows.concat(response.data.data);
+          cursor = response.data.next_cursor;
+        } while (cursor);
 
-        setTimesheets(response.data.data);
+        setTimesheets(rows);
         setPendingCount(
-          response.data.data.filter((t) => t.approval_status === "Pending").length
+          rows.filter((t) => t.approval_status === "Pending").length
         );
       } catch (error) {
         console.error("Error fetching timesheets:", error);